@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+import survey_schema
+import survey_table
+
+
+class AggregateCube:
+    """
+    Answer counts per week x education x question x Likert level.
+    Built once with np.bincount; medians, quartiles, means and percentages are
+    all derived from the counts, so they cost O(levels) per cell instead of a
+    pass over the respondents.
+    """
+
+    def __init__(self, weeks, educations, questions, counts, present):
+        self.weeks = list(weeks)            # week numbers
+        self.educations = list(educations)  # education groups, sorted
+        self.questions = list(questions)
+        self.counts = counts                # (week, education, question, level) int64
+        self.present = present              # (week, education) bool, the group has a frame that week
+        self.levels = np.arange(1, counts.shape[-1] + 1)
+
+    @classmethod
+    def from_long(cls, long: pd.DataFrame, levels=None):
+        """
+        Count the long survey table in one bincount.
+        The level axis defaults to the longest scale in the survey schema, so levels
+        nobody answered are still there (with count 0).
+        """
+        week = long["week"].cat.remove_unused_categories()
+        education = long["education"].cat.remove_unused_categories()
+        question = long["question"]
+
+        weeks = [int(w) for w in week.cat.categories]
+        educations = sorted(str(e) for e in education.cat.categories)
+        questions = [str(q) for q in question.cat.categories]
+
+        # education codes in sorted order
+        edu_order = np.array([educations.index(str(e)) for e in education.cat.categories], dtype=np.intp)
+        w = week.cat.codes.to_numpy().astype(np.intp)
+        e = edu_order[education.cat.codes.to_numpy()] if len(long) else np.array([], dtype=np.intp)
+        q = question.cat.codes.to_numpy().astype(np.intp)
+
+        value = long["value"]
+        answered = value.notna().to_numpy()
+        v = value.to_numpy(dtype=np.int64, na_value=0)[answered]
+        if levels is None:
+            levels = max(survey_schema.load_schema().levels, int(v.max()) if len(v) else 0)
+
+        n_w, n_e, n_q = len(weeks), len(educations), len(questions)
+        cell = ((w[answered] * n_e + e[answered]) * n_q + q[answered]) * levels + (v - 1)
+        counts = np.bincount(cell, minlength=n_w * n_e * n_q * levels).reshape(n_w, n_e, n_q, levels)
+
+        present = np.zeros((n_w, n_e), dtype=bool)
+        present[w, e] = True
+
+        return cls(weeks, educations, questions, counts, present)
+
+    # ---------------------------------------------------------------
+    # Selection
+
+    def week_index(self, weeks) -> list:
+        return [self.weeks.index(w) for w in weeks]
+
+    def question_index(self, questions) -> list:
+        return [self.questions.index(q) for q in questions]
+
+    def select(self, weeks=None, educations=None, questions=None) -> "AggregateCube":
+        """ Sub-cube of the given weeks, education groups and questions (default all), without recounting. """
+        weeks = self.weeks if weeks is None else [w for w in self.weeks if w in weeks]
+        educations = self.educations if educations is None else [e for e in self.educations if e in educations]
+        questions = self.questions if questions is None else [q for q in questions if q in self.questions]
+        w = self.week_index(weeks)
+        e = [self.educations.index(edu) for edu in educations]
+        q = self.question_index(questions)
+        counts = self.counts[np.ix_(w, e, q)]
+        return AggregateCube(weeks, educations, questions, counts, self.present[np.ix_(w, e)])
+
+    def educations_in(self, weeks=None) -> list:
+        """ Sorted education groups with data in any of the given weeks (default all). """
+        rows = self.present if weeks is None else self.present[self.week_index(weeks)]
+        return [edu for edu, seen in zip(self.educations, rows.any(axis=0)) if seen]
+
+    # ---------------------------------------------------------------
+    # Statistics, each shaped (week, education, question)
+
+    def n(self) -> np.ndarray:
+        return self.counts.sum(axis=-1)
+
+    def percentages(self) -> np.ndarray:
+        """ (week, education, question, level) share of answers in percent, 0 where there are none. """
+        n = self.n()[..., None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(n > 0, self.counts / n * 100, 0.0)
+
+    def mean(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (self.counts * self.levels).sum(axis=-1) / self.n()
+
+    def quantiles(self, ps) -> np.ndarray:
+        """
+        (len(ps), week, education, question) quantiles from one cumulative count.
+        Same linear interpolation as pandas' Series.quantile, NaN where there are no answers.
+        """
+        ps = np.asarray(ps, dtype=np.float64).reshape(-1, 1, 1, 1)
+        n = self.n()
+        cum = self.counts.cumsum(axis=-1)
+        h = (n - 1) * ps
+        lo = np.floor(h)
+        hi = np.ceil(h)
+
+        # value of the k-th smallest answer (0-based) is the first level with cum > k
+        def value_at(k):
+            return (cum <= k[..., None]).sum(axis=-1) + 1
+
+        v_lo = value_at(lo)
+        v_hi = value_at(hi)
+        result = v_lo + (h - lo) * (v_hi - v_lo)
+        return np.where(n > 0, result, np.nan)
+
+    def quantile(self, p: float) -> np.ndarray:
+        return self.quantiles([p])[0]
+
+    def median(self) -> np.ndarray:
+        return self.quantile(0.5)
+
+    def value_range(self, questions=None):
+        """ Smallest and largest answer given to the questions, or None if there are none. """
+        counts = self.counts if questions is None else self.counts[:, :, self.question_index(questions)]
+        seen = counts.sum(axis=(0, 1, 2)) > 0
+        if not seen.any():
+            return None
+        return int(self.levels[seen].min()), int(self.levels[seen].max())
+
+
+def cube_from_nested(dataframes_dict: dict, questions) -> AggregateCube:
+    flat = {
+        f"{edu}_Week{week}": df
+        for week, edu_dfs in dataframes_dict.items()
+        for edu, df in edu_dfs.items()
+    }
+    return AggregateCube.from_long(survey_table.to_long(flat, list(questions)))
+
+
+def as_cube(data, questions=None) -> AggregateCube:
+    """ Accept an AggregateCube, the long survey table or the nested {week: {education: df}} dict. """
+    if isinstance(data, AggregateCube):
+        return data
+    if survey_table.is_long(data):
+        return AggregateCube.from_long(data)
+    return cube_from_nested(data, questions)
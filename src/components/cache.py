@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+CACHE_BYTES = 64 * 1024 * 1024  # total size of the cached figures before the oldest are evicted
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Least recently used cache bounded by the total size of its values.
+    sizeof(value) gives the size of an entry; values larger than the whole cache are not kept.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_BYTES, sizeof=len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.entries = OrderedDict()  # key -> (value, size), oldest first
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+    def put(self, key, value) -> None:
+        size = self.sizeof(value)
+        with self.lock:
+            if key in self.entries:
+                self.total -= self.entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, size)
+            self.total += size
+            while self.total > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.total -= evicted
+
+    def __contains__(self, key) -> bool:
+        with self.lock:
+            return key in self.entries
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.entries)
+
+
+def memoize(cache: LRUCache):
+    """ Cache a function's results by its (hashable) arguments. """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args):
+            key = (func.__name__,) + args
+            # one locked lookup; a key evicted meanwhile is simply computed again
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = func(*args)
+                cache.put(key, result)
+            return result
+        wrapper.cache = cache
+        return wrapper
+    return decorator
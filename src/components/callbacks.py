@@ -0,0 +1,102 @@
+import base64
+import json
+import threading
+from io import BytesIO
+
+import matplotlib
+matplotlib.use("Agg")  # figures are rendered to PNG on the server
+import matplotlib.pyplot as plt
+from dash import Dash, Input, Output, dcc, html
+
+import plotting_data
+import visualisation
+from components import layout
+from components.cache import LRUCache, memoize
+
+DASH_DPI = 100
+
+# pyplot keeps global state, so only one callback draws at a time
+_plot_lock = threading.Lock()
+
+
+def payload_size(payload) -> int:
+    """ Size of a cached ("png"|"plotly", [strings]) payload in bytes. """
+    return sum(len(item) for item in payload[1])
+
+
+def figure_to_png(fig) -> str:
+    """ matplotlib figure -> PNG data URI, closing the figure. """
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png", dpi=DASH_DPI, bbox_inches="tight")
+    plt.close(fig)
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def render_payload(cube, schema, view: str, questions: tuple, weeks: tuple, educations: tuple) -> tuple:
+    """
+    Draw one view of the selected questions, weeks and education groups.
+    Returns ("plotly", [figure json, ...]) or ("png", [data URI, ...]).
+    """
+    selected = cube.select(list(weeks), list(educations))
+
+    if view == "area":
+        figures = [
+            plotting_data.stacked_area(selected, q, level_labels=schema.scale(q)).to_json()
+            for q in questions
+        ]
+        return "plotly", figures
+
+    with _plot_lock:
+        if view == "over_time":
+            figs = list(visualisation.plot_question_over_time(selected, list(questions)).values())
+        elif view == "stacked":
+            figs = [
+                visualisation.plot_stacked_distribution_multiweek(selected, q, list(weeks), schema.scale(q))
+                for q in questions
+            ]
+        elif view == "heatmap":
+            figs = [visualisation.plot_heatmap_questions_grid(selected, list(questions), list(weeks), title="")]
+        else:
+            raise ValueError(f"Unknown view: {view}")
+        return "png", [figure_to_png(fig) for fig in figs if fig is not None]
+
+
+def to_components(payload) -> list:
+    kind, items = payload
+    if kind == "plotly":
+        return [dcc.Graph(figure=json.loads(item)) for item in items]
+    return [html.Img(src=item, style={"maxWidth": "100%"}) for item in items]
+
+
+def register_callbacks(app: Dash, cube, schema, cache: LRUCache | None = None) -> None:
+    """
+    Serve the visualisations for the dashboard's filter state.
+    The dataset's count cube is built once; rendered views are kept in an LRU
+    cache keyed by the filter state, so repeated selections are not drawn again.
+    """
+    if cache is None:
+        cache = LRUCache(sizeof=payload_size)
+
+    @memoize(cache)
+    def cached_payload(view, questions, weeks, educations):
+        return render_payload(cube, schema, view, questions, weeks, educations)
+
+    @app.callback(
+        Output(layout.FIGURE_AREA, "children"),
+        Input(layout.VIEW_RADIO, "value"),
+        Input(layout.QUESTION_DROPDOWN, "value"),
+        Input(layout.WEEK_CHECKLIST, "value"),
+        Input(layout.EDUCATION_CHECKLIST, "value"),
+    )
+    def update_figures(view, questions, weeks, educations):
+        if not questions or not weeks or not educations:
+            return html.Div("Select at least one question, week and education.")
+
+        # same selection in any order -> same cache entry
+        key = (
+            view,
+            tuple(q for q in schema.questions if q in questions),
+            tuple(sorted(weeks)),
+            tuple(sorted(educations)),
+        )
+        return to_components(cached_payload(*key))
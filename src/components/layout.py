@@ -1,10 +1,74 @@
-from dash import Dash, html
+from dash import Dash, dcc, html
+import dash_bootstrap_components as dbc
+
+# component ids shared with components.callbacks
+QUESTION_DROPDOWN = "question-dropdown"
+VIEW_RADIO = "view-radio"
+WEEK_CHECKLIST = "week-checklist"
+EDUCATION_CHECKLIST = "education-checklist"
+FIGURE_AREA = "figure-area"
+
+VIEWS = {
+    "area": "Stacked area over time",
+    "over_time": "Median over time",
+    "stacked": "Distribution per week",
+    "heatmap": "Heatmap",
+}
+
+
+def create_layout(app: Dash, schema, weeks: list, educations: list) -> html.Div:
+    question_options = [
+        {"label": f"Q{schema.number(q)}: {q}", "value": q}
+        for q in schema.questions
+    ]
+    controls = dbc.Row([
+        dbc.Col([
+            html.Label("Questions"),
+            dcc.Dropdown(
+                id=QUESTION_DROPDOWN,
+                options=question_options,
+                value=schema.questions[:1],
+                multi=True,
+            ),
+            html.Label("View", className="mt-2"),
+            dcc.RadioItems(
+                id=VIEW_RADIO,
+                options=[{"label": label, "value": view} for view, label in VIEWS.items()],
+                value="area",
+                inline=True,
+                inputClassName="me-1",
+                labelClassName="me-3",
+            ),
+        ], md=8),
+        dbc.Col([
+            html.Label("Weeks"),
+            dcc.Checklist(
+                id=WEEK_CHECKLIST,
+                options=[{"label": f"Week {w}", "value": w} for w in weeks],
+                value=list(weeks),
+                inline=True,
+                inputClassName="me-1",
+                labelClassName="me-3",
+            ),
+            html.Label("Education", className="mt-2"),
+            dcc.Checklist(
+                id=EDUCATION_CHECKLIST,
+                options=[{"label": edu, "value": edu} for edu in educations],
+                value=list(educations),
+                inline=True,
+                inputClassName="me-1",
+                labelClassName="me-3",
+            ),
+        ], md=4),
+    ])
 
-def create_layout(app: Dash) -> html.Div:
     return html.Div(
         className="app-div",
         children=[
             html.H1(app.title),
             html.Hr(),
-            html.Div("Select sorting of y-axis:"),]
-    )
\ No newline at end of file
+            controls,
+            html.Hr(),
+            dcc.Loading(html.Div(id=FIGURE_AREA)),
+        ]
+    )
@@ -0,0 +1,171 @@
+import hashlib
+import inspect
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+import aggregates
+import survey_table
+
+DPI = 300
+MAX_WORKERS = None  # None = one worker per CPU, 1 = render in this process
+USE_CACHE = True    # skip figures whose inputs and plot function are unchanged
+MANIFEST_FILE = Path("figures/figure_manifest.json")  # output path -> key of the inputs it was rendered from
+# plots that need the answers of each respondent, not just the counts
+FRAME_FUNCTIONS = {"plot_histogram_multiweek"}
+
+
+class FigureJob(NamedTuple):
+    """ One figure to render: visualisation.<function>(data, question, [weeks], [mapping]) saved to path. """
+    function: str          # name of a plot function in visualisation
+    question: str | list   # question text, or a list for the grid/summary plots
+    weeks: list | int | None
+    mapping: dict | None   # Likert scale, for the plots that take one
+    path: str | Path
+
+
+def save_figure(fig, path):
+    import matplotlib.pyplot as plt
+    fig.savefig(
+        path,
+        dpi=DPI,
+        bbox_inches="tight"
+    )
+    plt.close(fig)
+
+
+# Each worker process keeps the dataset it was started with
+_worker_data = {}
+
+
+def _init_worker(long) -> None:
+    """ Load the dataset once per worker: the long table plus its count cube. """
+    import matplotlib
+    matplotlib.use("Agg")  # no windows in worker processes
+    _worker_data.clear()
+    _worker_data["long"] = long
+    _worker_data["cube"] = aggregates.AggregateCube.from_long(long)
+
+
+def _render_job(job: FigureJob) -> str:
+    import visualisation
+
+    func = getattr(visualisation, job.function)
+    if job.function in FRAME_FUNCTIONS:
+        # nested frames are built once per worker, not on every plot call
+        if "nested" not in _worker_data:
+            _worker_data["nested"] = survey_table.to_nested(_worker_data["long"])
+        data = _worker_data["nested"]
+    else:
+        data = _worker_data["cube"]
+    args = [job.question]
+    if job.weeks is not None:
+        args.append(job.weeks)
+    if job.mapping is not None:
+        args.append(job.mapping)
+
+    fig = func(data, *args)
+    if fig is None:
+        return None
+    save_figure(fig, job.path)
+    return str(job.path)
+
+
+@lru_cache(maxsize=None)
+def function_version(function: str) -> str:
+    """ Hash of the plot function's source, so editing a plot re-renders its figures. """
+    import visualisation
+    return hashlib.sha256(inspect.getsource(getattr(visualisation, function)).encode("utf-8")).hexdigest()
+
+
+def figure_key(job: FigureJob, cube: aggregates.AggregateCube, long: pd.DataFrame) -> str:
+    """
+    Content hash of everything a figure is drawn from: the job's arguments, the plot
+    function's version and the aggregated answers of its questions and weeks.
+    The output path is not part of the key.
+    """
+    questions = [job.question] if isinstance(job.question, str) else list(job.question)
+    if job.weeks is None:
+        weeks = cube.weeks
+    else:
+        weeks = [w for w in ([job.weeks] if isinstance(job.weeks, int) else job.weeks) if w in cube.weeks]
+
+    digest = hashlib.sha256()
+    arguments = [job.function, job.question, job.weeks, job.mapping, DPI, function_version(job.function)]
+    digest.update(json.dumps(arguments, ensure_ascii=False, default=str).encode("utf-8"))
+    digest.update(json.dumps([weeks, cube.educations], default=str).encode("utf-8"))
+
+    if job.function in FRAME_FUNCTIONS:
+        rows = long["week"].isin(weeks) & long["question"].isin(questions)
+        digest.update(pd.util.hash_pandas_object(long[rows], index=False).to_numpy().tobytes())
+    else:
+        w = cube.week_index(weeks)
+        q = cube.question_index([question for question in questions if question in cube.questions])
+        counts = cube.counts[np.ix_(w, range(len(cube.educations)), q)]
+        # drop unused top levels, so a new week with a longer scale elsewhere does not change the key
+        used = np.flatnonzero(counts.sum(axis=(0, 1, 2)))
+        counts = counts[..., :used[-1] + 1] if len(used) else counts[..., :0]
+        digest.update(np.ascontiguousarray(counts, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(cube.present[w]).tobytes())
+
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_file: Path = MANIFEST_FILE) -> dict:
+    if manifest_file.exists():
+        return json.loads(manifest_file.read_text(encoding="utf-8"))
+    return {}
+
+
+def save_manifest(manifest: dict, manifest_file: Path = MANIFEST_FILE) -> None:
+    manifest_file.parent.mkdir(parents=True, exist_ok=True)
+    manifest_file.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def stale_figures(jobs: list[FigureJob], keys: list[str], manifest: dict) -> list[FigureJob]:
+    """ Jobs whose figure is missing or was rendered from other inputs. """
+    return [
+        job for job, key in zip(jobs, keys)
+        if manifest.get(str(job.path)) != key or not Path(job.path).exists()
+    ]
+
+
+def render_figures(jobs: list[FigureJob], long=None, max_workers=MAX_WORKERS,
+                   use_cache: bool = USE_CACHE, manifest_file: Path = MANIFEST_FILE) -> list:
+    """
+    Render and save a batch of figures with the Agg backend, spread over a process pool.
+    long is the long survey table (default: load the dataset); every worker gets it once.
+    With use_cache, figures listed in the manifest with an unchanged key are skipped.
+    Returns the paths that were rendered, None for jobs without data.
+    """
+    if long is None:
+        from main_analysis import load_dataset
+        long = load_dataset(max_workers=max_workers).long
+
+    manifest = load_manifest(manifest_file)
+    cube = aggregates.AggregateCube.from_long(long)
+    keys = {str(job.path): figure_key(job, cube, long) for job in jobs}
+    todo = stale_figures(jobs, [keys[str(job.path)] for job in jobs], manifest) if use_cache else list(jobs)
+    print(f"{len(jobs) - len(todo)} of {len(jobs)} figures up to date")
+
+    if not todo:
+        paths = []
+    elif max_workers == 1 or len(todo) <= 1:
+        _init_worker(long)
+        paths = [_render_job(job) for job in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(long,)) as pool:
+            paths = list(pool.map(_render_job, todo))
+
+    for job, path in zip(todo, paths):
+        if path is None:
+            manifest.pop(str(job.path), None)
+        else:
+            manifest[str(job.path)] = keys[str(job.path)]
+    save_manifest(manifest, manifest_file)
+    return paths
@@ -1,8 +1,12 @@
 import matplotlib.pyplot as plt
 import likert_conversion
+import survey_schema
 import visualisation
 
-def show_visualization_menu(dataframes, likert_questions, REV_LIKERTS):
+def show_visualization_menu(dataframes, likert_questions, schema=None):
+    if schema is None:
+        schema = survey_schema.load_schema()
+
     while True:
         print("\n" + "="*50)
         print("LIKERT SCALE VISUALIZATION MENU")
@@ -34,21 +38,13 @@ def show_visualization_menu(dataframes, likert_questions, REV_LIKERTS):
             
             question = input(f"\nEnter choice (1-{len(likert_questions)}): ")
 
-            mapping = []
-
-            if int(question) <= 12:
-                mapping = REV_LIKERTS["likert_6pt"]
+            question = likert_questions[int(question)-1]
 
-            elif int(question) == 13 or int(question) == 14:
-                mapping = REV_LIKERTS["likert_7pt_1"]
-            
-            elif int(question) == 15:
-                mapping = REV_LIKERTS["likert_7pt_2"]
+            # Likert mapping from the survey schema
+            mapping = schema.scale(question)
 
             print("Likert mapping selected:", mapping)
 
-            question = likert_questions[int(question)-1]
-
             raw_input = input("Enter week number (comma separated, 5-9, or 0 for all weeks): ")
 
             weeks = [
@@ -1,8 +1,16 @@
 # id_mapping.py
 import pandas as pd
 import hashlib
+import json
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from functools import partial
+from itertools import islice
 from pathlib import Path
 
+from openpyxl import Workbook, load_workbook
+
 # -----------------------------
 # Brugervenlige variabler (kan ændres frit)
 INPUT_FILES = [Path("data/input_data/AGILE_5.xlsx"),
@@ -11,41 +19,339 @@ INPUT_FILES = [Path("data/input_data/AGILE_5.xlsx"),
           Path("data/input_data/AGILE_8.xlsx"),
           Path("data/input_data/AGILE_9.xlsx")]
 
-    
+
 OUTPUT_DIR = Path("data/output_data")  # hvor skal anonymiseret gemmes?
-ID_MAP_FILE = Path("data/id_map.csv")  # hvor gemmes id_map?
+ID_STORE_FILE = Path("data/id_map.sqlite")  # hvor gemmes id_map?
+ID_MAP_FILE = ID_STORE_FILE.with_name("id_map.csv")  # gammel mapping ved siden af storen, importeres første gang den oprettes
+MANIFEST_FILE = ID_STORE_FILE.with_name("id_map_manifest.json")  # hashes af allerede anonymiserede filer
 
 EMAIL_COLUMN = "Mail"     # hvad hedder kolonnen med email?
 NAME_COLUMN = "Navn"      # hvis du har navne i en kolonne
+
+OUTPUT_FORMAT = "xlsx"    # "xlsx" eller "parquet"
+CHUNK_SIZE = 5000         # antal rækker der læses/skrives ad gangen
+
+PARALLEL = True           # anonymiser alle filer samtidig i hver sin proces
+MAX_WORKERS = None        # antal processer (None = antal kerner)
+INCREMENTAL = True        # spring filer over som ikke er ændret siden sidste kørsel
 # -----------------------------
 
-# læs eksisterende mapping hvis den findes
+SQL_BATCH = 500           # max antal parametre pr. SQL-forespørgsel
+
+
+def create_id(email: str) -> str:
+    return hashlib.sha256(email.encode("utf-8")).hexdigest()[:10]
+
+
+def open_id_store(path: Path = ID_STORE_FILE, legacy_csv: Path | None = None) -> sqlite3.Connection:
+    """
+    Open (and if needed create) the SQLite id store.
+    Mail is the primary key, so lookups use the index instead of loading the whole map.
+    A new store imports the old id map once; by default the id_map.csv next to the store.
+    """
+    if legacy_csv is None:
+        legacy_csv = path.with_name(ID_MAP_FILE.name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # timeout: vent på andre kørsler der holder skrivelåsen
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS id_map (mail TEXT PRIMARY KEY, anon_id TEXT NOT NULL)")
+        is_empty = conn.execute("SELECT 1 FROM id_map LIMIT 1").fetchone() is None
+        if is_empty and legacy_csv.exists():
+            old = pd.read_csv(legacy_csv, dtype=str)
+            conn.executemany(
+                "INSERT OR IGNORE INTO id_map (mail, anon_id) VALUES (?, ?)",
+                zip(old[EMAIL_COLUMN], old["Anon_ID"]),
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        conn.close()
+        raise
+    return conn
+
+
+def _select_ids(conn: sqlite3.Connection, emails: list[str]) -> dict[str, str]:
+    found = {}
+    for i in range(0, len(emails), SQL_BATCH):
+        batch = emails[i:i + SQL_BATCH]
+        placeholders = ",".join("?" * len(batch))
+        found.update(conn.execute(
+            f"SELECT mail, anon_id FROM id_map WHERE mail IN ({placeholders})", batch
+        ).fetchall())
+    return found
+
+
+def get_or_create_ids(conn: sqlite3.Connection, emails) -> dict[str, str]:
+    """
+    Batched lookup-or-insert for a set of unique emails.
+    Known emails are read without locking; unknown ones are inserted under the
+    store's write lock, so several runs can share the store safely.
+    """
+    emails = list(dict.fromkeys(emails))
+    ids = _select_ids(conn, emails)
+    missing = [email for email in emails if email not in ids]
+    if not missing:
+        return ids
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # en anden kørsel kan have indsat nogle af dem, mens vi ventede på låsen
+        ids.update(_select_ids(conn, missing))
+        new = [(email, create_id(email)) for email in missing if email not in ids]
+        conn.executemany("INSERT INTO id_map (mail, anon_id) VALUES (?, ?)", new)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    ids.update(new)
+    return ids
+
+
+def iter_rows(infile: Path):
+    """ Stream the rows of the first sheet in a workbook without loading it into memory. """
+    wb = load_workbook(infile, read_only=True, data_only=True)
+    try:
+        for row in wb.worksheets[0].iter_rows(values_only=True):
+            # read-only mode can report trailing blank rows
+            if any(value is not None for value in row):
+                yield row
+    finally:
+        wb.close()
+
+
+def iter_chunks(rows, chunk_size: int):
+    """ Group an iterator of rows into lists of at most chunk_size rows. """
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_xlsx(outfile: Path, columns: list[str], chunks) -> None:
+    """ Write chunks of rows to a workbook in write-only (streaming) mode. """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(columns)
+    for chunk in chunks:
+        for row in chunk:
+            ws.append(row)
+    wb.save(outfile)
+
+
+def parquet_type(kinds: set):
+    """ Arrow type that holds every kind of value seen in a column without loss. """
+    import pyarrow as pa
+
+    kinds = kinds - {type(None)}
+    if not kinds:
+        return pa.string()  # helt tom kolonne
+    if kinds == {bool}:
+        return pa.bool_()
+    if kinds == {int}:
+        return pa.int64()
+    if kinds <= {int, float}:
+        return pa.float64()
+    if kinds == {datetime}:
+        return pa.timestamp("us")
+    if kinds == {date}:
+        return pa.date32()
+    # tekst, eller typer der ikke kan forenes
+    return pa.string()
+
+
+def infer_parquet_schema(rows, columns: list[str]):
+    """
+    Streaming pass over the rows that collects the kinds of values in each column,
+    so the schema covers the whole file and not just the first chunk.
+    """
+    import pyarrow as pa
+
+    kinds = [set() for _ in columns]
+    for row in rows:
+        for seen, value in zip(kinds, row):
+            seen.add(type(value))
+    return pa.schema([(col, parquet_type(seen)) for col, seen in zip(columns, kinds)])
+
+
+def write_parquet(outfile: Path, columns: list[str], chunks, schema=None) -> None:
+    """
+    Write chunks of rows to a Parquet file, one row group per chunk.
+    Every chunk is cast to the schema with a safe cast, so a value that does not fit
+    raises instead of being truncated. Without a schema every column is stored as text.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if schema is None:
+        schema = pa.schema([(col, pa.string()) for col in columns])
+    as_text = [pa.types.is_string(field.type) for field in schema]
+
+    with pq.ParquetWriter(outfile, schema) as writer:
+        for chunk in chunks:
+            data = {
+                col: [row[i] if row[i] is None or not text else str(row[i]) for row in chunk]
+                for i, (col, text) in enumerate(zip(columns, as_text))
+            }
+            writer.write_table(pa.Table.from_pydict(data).cast(schema, safe=True))
 
-if ID_MAP_FILE.exists():
-    id_map = pd.read_csv(ID_MAP_FILE, dtype=str).set_index(EMAIL_COLUMN)["Anon_ID"].to_dict()
-else:
-    id_map = {}
 
-def get_or_create_id(email: str) -> str:
-    if email not in id_map:
-        anon_id = hashlib.sha256(email.encode("utf-8")).hexdigest()[:10]
-        id_map[email] = anon_id
-    return id_map[email]
+WRITERS = {
+    "xlsx": write_xlsx,
+    "parquet": write_parquet,
+}
 
-print("input-filer: ",INPUT_FILES)
 
-for infile in INPUT_FILES:
-    if not infile.exists():
-        print("file not found")
+def anonymise_file(infile: Path, output_dir: Path = OUTPUT_DIR,
+                   output_format: str = OUTPUT_FORMAT, chunk_size: int = CHUNK_SIZE,
+                   id_store: Path = ID_STORE_FILE) -> Path:
+    """
+    Anonymise one export row by row.
+    Mail is replaced by Anon_ID, Navn/Mail are dropped, and the output is written
+    chunk by chunk, so memory use does not depend on the size of the file.
+    Ids are looked up in the store once per unique email.
+    """
+    if output_format not in WRITERS:
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of {list(WRITERS)}")
+
+    rows = iter_rows(infile)
+    header = [str(col) for col in next(rows)]
+    email_idx = header.index(EMAIL_COLUMN)
+    keep_idx = [i for i, col in enumerate(header) if col not in (NAME_COLUMN, EMAIL_COLUMN)]
+    columns = [header[i] for i in keep_idx] + ["Anon_ID"]
+
+    conn = open_id_store(id_store)
+    ids = {}  # emails der allerede er slået op i denne fil
+
+    def anonymised_chunks():
+        for chunk in iter_chunks(rows, chunk_size):
+            # samme tekstkonvertering som astype(str) i pandas (tom celle -> "nan")
+            emails = ["nan" if row[email_idx] is None else str(row[email_idx]) for row in chunk]
+            new_emails = {email for email in emails if email not in ids}
+            if new_emails:
+                ids.update(get_or_create_ids(conn, new_emails))
+            yield [[row[i] for i in keep_idx] + [ids[email]] for row, email in zip(chunk, emails)]
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    outfile = output_dir / f"{infile.stem}_anon.{output_format}"
+    writer = WRITERS[output_format]
+    if output_format == "parquet":
+        # første gennemløb: kolonnetyper for hele filen (Anon_ID er altid tekst)
+        source = iter_rows(infile)
+        next(source)
+        schema = infer_parquet_schema(([row[i] for i in keep_idx] + [""] for row in source), columns)
+        writer = partial(write_parquet, schema=schema)
+    try:
+        writer(outfile, columns, anonymised_chunks())
+    finally:
+        conn.close()
+    return outfile
+
+
+def anonymise_files_parallel(files: list[Path], output_dir: Path = OUTPUT_DIR,
+                             output_format: str = OUTPUT_FORMAT, chunk_size: int = CHUNK_SIZE,
+                             max_workers: int | None = MAX_WORKERS) -> list[Path]:
+    """
+    Anonymise several exports at once on a process pool.
+    Each worker looks up or inserts the emails of its own file in the shared id store.
+    Ids are derived from the email alone, so the result is the same as a serial run.
+    """
+    if not files:
+        return []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(
+            anonymise_file,
+            files,
+            [output_dir] * len(files),
+            [output_format] * len(files),
+            [chunk_size] * len(files),
+        ))
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """ Hash a file in blocks. """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest() -> dict:
+    if MANIFEST_FILE.exists():
+        return json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+    return {}
+
+
+def save_manifest(manifest: dict) -> None:
+    MANIFEST_FILE.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def is_up_to_date(infile: Path, manifest: dict, output_dir: Path = OUTPUT_DIR,
+                  output_format: str = OUTPUT_FORMAT) -> bool:
+    """
+    Check whether infile was already anonymised to its current _anon output.
+    Size and mtime are compared first; the content hash is only computed when they differ.
+    """
+    entry = manifest.get(str(infile))
+    outfile = output_dir / f"{infile.stem}_anon.{output_format}"
+    if entry is None or entry.get("output") != str(outfile) or not outfile.exists():
+        return False
+
+    stat = infile.stat()
+    if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+        return True
+
+    if entry["sha256"] != file_sha256(infile):
+        return False
+
+    # samme indhold, kun mtime er ændret (fx kopieret igen)
+    entry["size"] = stat.st_size
+    entry["mtime"] = stat.st_mtime
+    return True
+
+
+def manifest_entry(infile: Path, outfile: Path) -> dict:
+    stat = infile.stat()
+    return {
+        "sha256": file_sha256(infile),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "output": str(outfile),
+    }
+
+
+def main() -> None:
+    print("input-filer: ",INPUT_FILES)
+
+    manifest = load_manifest() if INCREMENTAL else {}
+
+    files = []
+    for infile in INPUT_FILES:
+        if not infile.exists():
+            print("file not found")
+        elif INCREMENTAL and is_up_to_date(infile, manifest):
+            print(f"Unchanged, skipping {infile}")
+        else:
+            files.append(infile)
+
+    if PARALLEL:
+        outfiles = anonymise_files_parallel(files)
     else:
-        df = pd.read_excel(infile)
-        df["Anon_ID"] = df[EMAIL_COLUMN].astype(str).map(get_or_create_id)
-        df = df.drop(columns=[NAME_COLUMN, EMAIL_COLUMN])  # fjern følsom kolonne
-    
-        outfile = OUTPUT_DIR / f"{infile.stem}_anon.xlsx"
-        df.to_excel(outfile, index=False)
+        outfiles = [anonymise_file(infile) for infile in files]
+
+    for infile, outfile in zip(files, outfiles):
         print(f"Anonymised {infile} → {outfile}")
+        manifest[str(infile)] = manifest_entry(infile, outfile)
+
+    # nye ids er allerede gemt i storen, så manifestet kan skrives til sidst
+    print(f"Mapping updated: {ID_STORE_FILE}")
+    save_manifest(manifest)
+
 
-# gem opdateret mapping til sidst
-pd.DataFrame(list(id_map.items()), columns=[EMAIL_COLUMN, "Anon_ID"]).to_csv(ID_MAP_FILE, index=False)
-print(f"Mapping updated: {ID_MAP_FILE}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,62 @@
+import numpy as np
+import pandas as pd
+
+
+def normalise(text) -> str:
+    """ Strip and collapse whitespace, as the answers are compared on text. """
+    return " ".join(str(text).split())
+
+
+class LikertEncoder:
+    """
+    Convert Likert text answers to Int8 codes, each column with its own scale.
+    Every column is factorized, so only its unique answers are normalised and
+    looked up. Answers that are not on the column's scale become <NA> and are
+    collected in self.unmapped.
+    """
+
+    def __init__(self, column_scales: dict):
+        # {column: {"Completely disagree": 1, ...}}, with normalised keys
+        self.column_scales = {
+            col: {normalise(text): value for text, value in mapping.items()}
+            for col, mapping in column_scales.items()
+        }
+        self.unmapped = {}
+
+    def encode_column(self, values: pd.Series, mapping: dict):
+        """ Return (Int8 array, list of answers that are not on the scale). """
+        codes, uniques = pd.factorize(values)  # NaN -> -1
+        lookup = np.zeros(len(uniques) + 1, dtype=np.int8)
+        known = np.zeros(len(uniques) + 1, dtype=bool)
+        unmapped = []
+        for i, answer in enumerate(uniques):
+            value = mapping.get(normalise(answer))
+            if value is None:
+                unmapped.append(answer)
+            else:
+                lookup[i] = value
+                known[i] = True
+        # the extra last slot is picked by code -1 (missing answer)
+        return pd.arrays.IntegerArray(lookup[codes], ~known[codes]), unmapped
+
+    def encode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """ Encode all columns with a scale in one pass; other columns are shared, not copied. """
+        encoded = df.copy(deep=False)
+        for col, mapping in self.column_scales.items():
+            if col not in df.columns:
+                continue
+            encoded[col], unmapped = self.encode_column(df[col], mapping)
+            if unmapped:
+                known = self.unmapped.setdefault(col, [])
+                new = [answer for answer in unmapped if answer not in known]
+                if new:
+                    print(f"Unmapped Likert answers in '{col}': {new}")
+                    known.extend(new)
+        return encoded
+
+
 def convert_likert_to_numeric(df, likert_columns, mapping):
     """
     Convert Likert scale text responses to numbers.
     """
-    df_copy = df.copy()
-    
-    for col in likert_columns:
-        if col in df_copy.columns:
-            df_copy[col] = (
-                df_copy[col]
-                .astype(str)
-                .str.strip()
-                .str.replace(r"\s+", " ", regex=True)
-                .map(mapping)
-                )
-    
-    return df_copy
+    return LikertEncoder({col: mapping for col in likert_columns}).encode(df)
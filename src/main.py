@@ -1,14 +1,22 @@
 from dash import Dash, html
 from dash_bootstrap_components.themes import BOOTSTRAP
 
+from components.callbacks import register_callbacks
 from components.layout import create_layout
+from main_analysis import load_dataset
+from survey_schema import load_schema
 
 def main() -> None:
+    # workbooks are read and counted once, every callback works on the cube
+    schema = load_schema()
+    cube = load_dataset().cube
+
     app = Dash(external_stylesheets=[BOOTSTRAP])
     app.title = "Capacity Self-Assessment Tool"
-    app.layout = create_layout(app)
+    app.layout = create_layout(app, schema, cube.weeks, cube.educations)
+    register_callbacks(app, cube, schema)
     app.run()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
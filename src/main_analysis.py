@@ -1,77 +1,59 @@
+import survey_schema
+
 
 # --------------------------------
 # statement for agreeing in the survey
-def to_include() -> str:
-
-    PARTICIPANT_INFO_AGREEMENT = "I have read the participant information and consent to my data being collected and used in anonymised form for this study."
+def to_include(schema: survey_schema.Schema | None = None) -> tuple:
+    """
+    Questions, columns and Likert scales of the survey, from survey_schema.json.
+    Constructs and scales are returned as dicts keyed by their names in the schema,
+    so a new construct or scale only needs an entry in the json file.
+    """
+    schema = schema or survey_schema.load_schema()
+
+    PARTICIPANT_INFO_AGREEMENT = schema.consent
     # --------------------------------
-    # Questions to include in the analysis:
-    MOTIVATION = [
-        "I felt confident in working with the methodology today",
-        "I am interested in the methodology of this course",
-        "This course is relevant for me in my future",
-        "I want to gain practical knowledge",
-        "I want to gain theoretical knowledge",
-        "I feel like I know more than I did last week",
-        "I feel that I have influence and responsibility in my group, and that my inclusion and opinions are valued"
-    ]
-
-    CAPACITY = [
-        "I feel like I can use my (priorly learned) skills in the course",
-        "I feel like I am acquiring new skills every week with the Agile methodology",
-        "The teacher",
-        "The TA's",
-        "Other students"
-    ]
-
-    UNCERTAINTY = [
-        "How much uncertainty do you encounter in this course regarding the end goal at this point?",
-        "How much uncertainty did you encounter in the Agile methodology from today?",
-        "How easy or difficult would it be to make changes to your design at this stage?"
-    ]
-    '''What is relevant to include in the dataframe:'''
-    INFO = ["Anon_ID"] + [PARTICIPANT_INFO_AGREEMENT]
-
-    EDU = ["What bachelor's programme did you follow?", "What master's programme do you follow?"]
-
-    ALL_Qs = MOTIVATION + CAPACITY + UNCERTAINTY
+    # Questions to include in the analysis, {"MOTIVATION": [...], ...}
+    CONSTRUCTS = schema.constructs
 
-    include_in_df = INFO + EDU + ALL_Qs
+    '''What is relevant to include in the dataframe:'''
+    INFO = schema.info
+    EDU = schema.education
 
-    likert_6pt = {"Completely disagree": 1, "Mostly disagree": 2, "Slightly disagree": 3, "Slightly agree": 4, "Mostly agree": 5, "Completely agree": 6}
+    include_in_df = schema.include_in_df
 
-    likert_7pt_1 = {"None at all": 1, "Very little": 2, "Little": 3, "Some": 4, "Much": 5, "A great deal": 6, "Extreme amount": 7}
+    # {"likert_6pt": {...}, ...}
+    LIKERTS = schema.scales
+    return PARTICIPANT_INFO_AGREEMENT, EDU, INFO, CONSTRUCTS, include_in_df, LIKERTS
 
-    likert_7pt_2 = {"Impossible": 1,"Very difficult": 2, "Difficult": 3, "Somewhat difficult": 4, "Somewhat easy": 5, "Easy": 6, "Very easy": 7}
-    return PARTICIPANT_INFO_AGREEMENT, EDU, INFO, MOTIVATION, CAPACITY, UNCERTAINTY, include_in_df, likert_6pt, likert_7pt_1, likert_7pt_2
+SCHEMA = survey_schema.load_schema()
 
-PARTICIPANT_INFO_AGREEMENT, EDU, INFO, MOTIVATION, CAPACITY, UNCERTAINTY, include_in_df, likert_6pt, likert_7pt_1, likert_7pt_2 = to_include()
+PARTICIPANT_INFO_AGREEMENT, EDU, INFO, CONSTRUCTS, include_in_df, LIKERTS = to_include(SCHEMA)
 
-LIKERTS = {
-    "likert_6pt": likert_6pt,
-    "likert_7pt_1": likert_7pt_1,
-    "likert_7pt_2": likert_7pt_2
-}
+# every construct and scale as a module constant, e.g. MOTIVATION and likert_6pt
+globals().update(CONSTRUCTS)
+globals().update(LIKERTS)
 
-REV_LIKERTS = {
-    "likert_6pt": {v: k for k, v in likert_6pt.items()},
-    "likert_7pt_1": {v: k for k, v in likert_7pt_1.items()},
-    "likert_7pt_2": {v: k for k, v in likert_7pt_2.items()}
-}
+REV_LIKERTS = SCHEMA.reverse_scales
 
 # print("Reversed Likert Scales:\n", REV_LIKERTS)
 
+import sys
+import time
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from itertools import repeat
 from pathlib import Path
 
+import aggregates
 import sort_education
-import plotting_data
+import read_cache
+import response_rates
+import survey_table
 import timeseries
-import visualisation
-import likert_conversion
-import gui
+import transitions
 
 def count_columns(df, columns_to_count, index):
     """ Count occurrences of answers in specified columns. """
@@ -85,127 +67,341 @@ def count_columns(df, columns_to_count, index):
     return counted_df
 
 
-ANON_FILES = [
-          Path("data/output_data/AGILE_5_anon.xlsx"),
-          Path("data/output_data/AGILE_6_anon.xlsx"),
-          Path("data/output_data/AGILE_7_anon.xlsx"),
-          Path("data/output_data/AGILE_8_anon.xlsx"),
-          Path("data/output_data/AGILE_9_anon.xlsx")]
+ANON_DIR = Path("data/output_data")
+ANON_PATTERN = "AGILE_*_anon.*"
+# if a week exists in several formats, the first one in this list is used
+ANON_SUFFIXES = [".parquet", ".xlsx"]
 
+MAX_WORKERS = None  # processes used to load week files (None = number of cores, 1 = no pool)
+WATCH_INTERVAL = 5  # seconds between checks for new week files in watch mode
 
-def read_and_sort(files: list[Path], columns_to_include: str()) -> pd.DataFrame: # type: ignore
-    """ Read and sort data files into a dictionary of dataframes."""
 
-    dfs = {}
-    week_list = []
+def week_number(file: Path) -> int:
+    return int(file.stem.split("_")[1])
 
-    data = {}
-    archeng = "archeng_students"
-    arch = "arch_students"
-    oth = "oth_students"
 
-    for file in files:
-        if not file.exists():
-            print(f"File {file} does not exist, skipping...")
+def week_name(file: Path) -> str:
+    return "Week" + file.stem.split("_")[1]
+
+
+def discover_week_files(directory: Path = ANON_DIR, pattern: str = ANON_PATTERN) -> list[Path]:
+    """ Find the anonymised week files in directory, one per week, sorted by week number. """
+    found = {}
+    for file in directory.glob(pattern):
+        if file.suffix not in ANON_SUFFIXES or not file.stem.split("_")[1].isdigit():
             continue
-        else:
-            print(f"TESTING {file}...")
+        week = week_number(file)
+        if week not in found or ANON_SUFFIXES.index(file.suffix) < ANON_SUFFIXES.index(found[week].suffix):
+            found[week] = file
+    return [found[week] for week in sorted(found)]
 
-            init_df = pd.read_excel(file)
 
-            # Only include those who agreed to participate:
-            df = init_df[init_df[PARTICIPANT_INFO_AGREEMENT] == "Yes"]
+def file_signature(file: Path) -> tuple:
+    stat = file.stat()
+    return stat.st_size, stat.st_mtime_ns
 
-            week_name = "Week" + file.stem.split("_")[1]
-            week_list.append(week_name)
-            # df.set_index("Anon_ID", inplace=True)
 
-            # Only include relevant columns:
-            dfs[week_name] = init_df[include_in_df].copy() #dict of dataframes
+def key_week(key: str) -> int:
+    """ Week number of a 'Week5' or 'archeng_students_Week5' key. """
+    return int(key.rsplit("Week", 1)[1])
 
-            # Create education groups
-            education_groups = sort_education.create_education_groups(dfs[week_name])
 
-            # Store specific education program dataframes
-            if education_groups.get('Architectural Engineering (any university)') is not None:
-                data[f"{archeng}_{week_name}"] = education_groups['Architectural Engineering (any university)']
+def read_week(file: Path, columns_to_include) -> pd.DataFrame:
+    """ Read one week file with only the relevant columns and consenting rows. """
+    print(f"TESTING {file}...")
 
-            if education_groups.get('Architecture (any university)') is not None:
-                data[f"{arch}_{week_name}"] = education_groups['Architecture (any university)']
+    # Only the relevant columns of those who agreed to participate are read:
+    return read_cache.read_table(
+        file,
+        columns_to_include,
+        filters=[(PARTICIPANT_INFO_AGREEMENT, "==", "Yes")]
+    )
 
-            if education_groups.get('Other') is not None:
-                data[f"{oth}_{week_name}"] = education_groups['Other']
-            
-            # # View all programs
-            # print(list(education_groups.keys()))
 
-            # # Check sizes
-            # for program, program_df in education_groups.items():
-            #     print(f"{program}: {len(program_df)} students")
+def load_week(file: Path, columns_to_include) -> dict:
+    """ Read and sort one week file into '<group>_<week>' dataframes. """
+    return sort_weeks({week_name(file): read_week(file, columns_to_include)})
 
-            # for i, col in enumerate(dfs[week_name].columns):
-            #     print(f"{i}: '{col}'")
 
-    return data
+def map_files(func, files: list[Path], columns_to_include, max_workers=MAX_WORKERS) -> list:
+    """
+    Run func(file, columns_to_include) for every existing file, on a process pool
+    when there is more than one file. Results come back in the order of files.
+    """
+    existing = []
+    for file in files:
+        if not file.exists():
+            print(f"File {file} does not exist, skipping...")
+        else:
+            existing.append(file)
 
-dfs = read_and_sort(ANON_FILES, include_in_df)
+    if max_workers == 1 or len(existing) <= 1:
+        return [(file, func(file, columns_to_include)) for file in existing]
 
-# Flat dictionary
-flat_data = dfs
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(func, existing, repeat(columns_to_include))
+        return list(zip(existing, results))
 
-# Convert all your dataframes
-for key in flat_data:
-    flat_data[key] = likert_conversion.convert_likert_to_numeric(flat_data[key], MOTIVATION + CAPACITY, LIKERTS["likert_6pt"])
-    flat_data[key] = likert_conversion.convert_likert_to_numeric(flat_data[key], UNCERTAINTY[:2], LIKERTS["likert_7pt_1"])
-    flat_data[key] = likert_conversion.convert_likert_to_numeric(flat_data[key], [UNCERTAINTY[2]], LIKERTS["likert_7pt_2"])
 
-# Convert it
-dataframes = visualisation.restructure_flat_dict(flat_data)
+def read_weeks(files: list[Path], columns_to_include, max_workers=MAX_WORKERS) -> dict:
+    """ Read each week file into a dataframe with only the relevant columns and consenting rows. """
+    return {
+        week_name(file): df
+        for file, df in map_files(read_week, files, columns_to_include, max_workers)
+    }
 
 
+def sort_weeks(dfs: dict) -> dict:
+    """ Split each week's dataframe into education groups, keyed '<group>_<week>'. """
 
-# Extract study lines and weeks from keys, count responses
-data_dict = {}
-for name, data in flat_data.items():
-    parts = name.split("_")
-    study_line = parts[0]  # 'arch', 'archeng', 'oth'
-    week = parts[2]  # 'Week5', 'Week6', etc.
-    
-    # Count unique respondents
-    response_count = data["Anon_ID"].nunique()
-    
-    # Store in nested dictionary
-    if study_line not in data_dict:
-        data_dict[study_line] = {}
-    data_dict[study_line][week] = response_count
+    data = {}
+    archeng = "archeng_students"
+    arch = "arch_students"
+    oth = "oth_students"
 
-# Create dataframe from the nested dictionary
-resp_df = pd.DataFrame.from_dict(data_dict, orient='index')
+    for week_name, week_df in dfs.items():
+        # Create education groups
+        education_groups = sort_education.create_education_groups(week_df)
 
-# Replace NaN with 0
-resp_df = resp_df.fillna(0)
+        # Store specific education program dataframes
+        if education_groups.get('Architectural Engineering (any university)') is not None:
+            data[f"{archeng}_{week_name}"] = education_groups['Architectural Engineering (any university)']
 
-# Sort columns by week number
-resp_df = resp_df.reindex(sorted(resp_df.columns, key=lambda x: int(x.replace('Week', ''))), axis=1)
+        if education_groups.get('Architecture (any university)') is not None:
+            data[f"{arch}_{week_name}"] = education_groups['Architecture (any university)']
 
-# Add totals row
-resp_df.loc['Total'] = resp_df.sum()
+        if education_groups.get('Other') is not None:
+            data[f"{oth}_{week_name}"] = education_groups['Other']
 
-# print("Response Rates:\n", resp_df)
+        # # View all programs
+        # print(list(education_groups.keys()))
 
+        # # Check sizes
+        # for program, program_df in education_groups.items():
+        #     print(f"{program}: {len(program_df)} students")
 
-# Print response rates for each educational background for each week in ONE excel file
-response_rates_dir = Path("figures/response_rates/")
-response_rates_dir.mkdir(parents=True, exist_ok=True)
+    return data
 
-with pd.ExcelWriter(response_rates_dir / "response_rates_by_education.xlsx") as writer:
-    resp_df.to_excel(writer, sheet_name="Response Rates", index=True)
 
+def read_and_sort(files: list[Path], columns_to_include: str(), max_workers=MAX_WORKERS) -> pd.DataFrame: # type: ignore
+    """ Read and sort data files into a dictionary of dataframes, one week per worker process."""
+    data = {}
+    for _, week_data in map_files(load_week, files, columns_to_include, max_workers):
+        data.update(week_data)
+    return data
 
-"""
-GUI Visualization Menu
-"""
-gui.show_visualization_menu(dataframes, MOTIVATION + CAPACITY + UNCERTAINTY, LIKERTS)
+
+# Likert scale of every question column
+LIKERT_ENCODER = SCHEMA.encoder()
+
+
+def convert_all(flat_data: dict) -> dict:
+    """ Convert the Likert answers of every dataframe to Int8 codes. """
+    return {key: LIKERT_ENCODER.encode(df) for key, df in flat_data.items()}
+
+
+# stages built from all weeks together; refresh() rebuilds them on next use
+DERIVED_STAGES = ("dataframes", "long", "nested", "cube", "panel", "transitions", "paired_tests",
+                  "response_tables", "response_rates")
+STAGES = ("weeks", "groups", "flat_data") + DERIVED_STAGES
+
+
+class Dataset:
+    """
+    Survey data with lazily evaluated stages.
+    Each stage (read, sort, convert, group) is computed the first time it is
+    used and memoized, so scripts only pay for what they use.
+    Without an explicit file list the week files are discovered in ANON_DIR,
+    and refresh() ingests only new or changed weeks.
+    """
+
+    def __init__(self, files: list[Path] | None = None, columns_to_include=include_in_df,
+                 max_workers=MAX_WORKERS):
+        self.files = list(files) if files is not None else None
+        self.columns_to_include = list(columns_to_include)
+        self.max_workers = max_workers
+        self.signatures = None  # file -> (size, mtime) when it was read, None until the first scan
+
+    def week_files(self) -> list[Path]:
+        return self.files if self.files is not None else discover_week_files()
+
+    def _scan(self) -> list[Path]:
+        """ The files to read; every stage uses the set found by the first scan until refresh(). """
+        if self.signatures is None:
+            files = [file for file in self.week_files() if file.exists()]
+            self.signatures = {file: file_signature(file) for file in files}
+        return list(self.signatures)
+
+    @cached_property
+    def weeks(self) -> dict:
+        """ {'Week5': df, ...} with the relevant columns of each file. """
+        return read_weeks(self._scan(), self.columns_to_include, self.max_workers)
+
+    @cached_property
+    def groups(self) -> dict:
+        """ {'archeng_students_Week5': df, ...} split by education. """
+        if "weeks" in self.__dict__:
+            return sort_weeks(self.weeks)
+        # read and sort every week in its own process
+        return read_and_sort(self._scan(), self.columns_to_include, self.max_workers)
+
+    @cached_property
+    def flat_data(self) -> dict:
+        """ Like groups, with Likert answers converted to numbers. """
+        return convert_all(self.groups)
+
+    @cached_property
+    def dataframes(self) -> dict:
+        """ {5: {'archeng_students': df, ...}, ...} as used by visualisation. """
+        import visualisation  # matplotlib/seaborn are only imported when needed
+        return visualisation.restructure_flat_dict(self.flat_data)
+
+    @cached_property
+    def long(self) -> pd.DataFrame:
+        """ Compact (week, education, Anon_ID, question, value) table, see survey_table. """
+        return survey_table.to_long(self.flat_data, SCHEMA.questions)
+
+    @cached_property
+    def nested(self) -> dict:
+        """ The long table as {week: {education: df}} of the questions, built once, see survey_table.to_nested. """
+        return survey_table.to_nested(self.long)
+
+    @cached_property
+    def cube(self) -> aggregates.AggregateCube:
+        """ Answer counts per week, education, question and level, see aggregates. """
+        return aggregates.AggregateCube.from_long(self.long)
+
+    @cached_property
+    def panel(self) -> timeseries.Panel:
+        """ Respondent x week x question array of all answers, see timeseries. """
+        return timeseries.build_panel(self.long)
+
+    @cached_property
+    def transitions(self) -> transitions.Transitions:
+        """ Week-to-week transition matrices and change shares, see transitions. """
+        return transitions.compute_transitions(self.panel)
+
+    @cached_property
+    def paired_tests(self) -> pd.DataFrame:
+        """ Wilcoxon tests and bootstrap intervals for all week pairs, see paired_stats. """
+        import paired_stats  # scipy is only imported when needed
+        return paired_stats.paired_tests(self.panel, max_workers=self.max_workers)
+
+    @cached_property
+    def response_tables(self) -> dict:
+        """ Response counts, rates and retention per study line, see response_rates. """
+        return response_rates.response_tables(self.long)
+
+    @cached_property
+    def response_rates(self) -> pd.DataFrame:
+        return self.response_tables["Response Rates"]
+
+    def refresh(self) -> list[str]:
+        """
+        Re-ingest week files that are new, changed or removed since they were read.
+        Only those weeks are read, sorted and converted again; the stages that
+        combine all weeks are dropped and rebuilt on next use.
+        Returns the names of the weeks that changed.
+        """
+        if self.signatures is None:
+            return []  # nothing read yet, everything is loaded lazily anyway
+
+        current = {file: file_signature(file) for file in self.week_files() if file.exists()}
+        if not self.signatures:
+            # the first scan found no files (e.g. --watch started early): drop the empty stages
+            # and let them read everything that has appeared
+            if not current:
+                return []
+            for stage in STAGES:
+                self.__dict__.pop(stage, None)
+            self.signatures = current
+            return sorted({week_name(file) for file in current}, key=key_week)
+        changed = [file for file, sig in current.items() if self.signatures.get(file) != sig]
+        removed = [file for file in self.signatures if file not in current]
+        if not changed and not removed:
+            return []
+
+        changed_weeks = {week_name(file) for file in changed + removed}
+
+        def keep(stage: dict) -> dict:
+            return {key: df for key, df in stage.items()
+                    if "Week" + str(key_week(key)) not in changed_weeks}
+
+        def by_week(stage: dict) -> dict:
+            # sorted() is stable, so the group order within a week is kept
+            return dict(sorted(stage.items(), key=lambda item: key_week(item[0])))
+
+        if "weeks" in self.__dict__:
+            weeks = keep(self.weeks)
+            weeks.update(read_weeks(changed, self.columns_to_include, self.max_workers))
+            self.weeks = by_week(weeks)
+
+        if "groups" in self.__dict__:
+            groups = keep(self.groups)
+            if "weeks" in self.__dict__:
+                new_groups = sort_weeks({week_name(file): self.weeks[week_name(file)] for file in changed})
+            else:
+                new_groups = read_and_sort(changed, self.columns_to_include, self.max_workers)
+            groups.update(new_groups)
+            self.groups = by_week(groups)
+
+            if "flat_data" in self.__dict__:
+                flat_data = keep(self.flat_data)
+                flat_data.update(convert_all(new_groups))
+                self.flat_data = by_week(flat_data)
+
+        for stage in DERIVED_STAGES:
+            self.__dict__.pop(stage, None)
+
+        self.signatures = current
+        return sorted(changed_weeks, key=key_week)
+
+
+def load_dataset(files: list[Path] | None = None, columns_to_include=include_in_df,
+                 max_workers=MAX_WORKERS) -> Dataset:
+    """ Create a dataset; nothing is read until a stage is used. """
+    return Dataset(files, columns_to_include, max_workers)
+
+
+def watch(dataset: Dataset, on_change, interval: float = WATCH_INTERVAL) -> None:
+    """ Poll for new or changed week files and call on_change(dataset, changed_weeks). """
+    print(f"Watching {ANON_DIR} for new week files (Ctrl+C to stop)...")
+    try:
+        while True:
+            changed_weeks = dataset.refresh()
+            if changed_weeks:
+                print("Updated:", ", ".join(changed_weeks))
+                on_change(dataset, changed_weeks)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def write_response_rates(dataset: Dataset, changed_weeks=None) -> None:
+    # Print response rates for each educational background for each week in ONE excel file
+    response_rates_dir = Path("figures/response_rates/")
+    response_rates_dir.mkdir(parents=True, exist_ok=True)
+
+    response_rates.write_excel(dataset.response_tables, response_rates_dir / "response_rates_by_education.xlsx")
+
+
+def main() -> None:
+    import gui
+
+    dataset = load_dataset()
+
+    # print("Response Rates:\n", dataset.response_rates)
+    write_response_rates(dataset)
+
+    if "--watch" in sys.argv:
+        # opdater analysen hver gang en ny uges eksport lander
+        watch(dataset, write_response_rates)
+        return
+
+    """
+    GUI Visualization Menu
+    """
+    gui.show_visualization_menu(dataset.dataframes, SCHEMA.questions, SCHEMA)
 
 # --------------------------------
 # fig1 = visualisation.plot_question_over_time(dataframes, 'I am interested in the methodology of this course')
@@ -231,7 +427,7 @@ gui.show_visualization_menu(dataframes, MOTIVATION + CAPACITY + UNCERTAINTY, LIK
 # plt.show()
 
 
-# timeseries = timeseries.time_series_df(dfs, "I felt confident in working with the methodology today", "Anon_ID",False)
+# timeseries = timeseries.time_series_df(dfs, "I felt confident in working with the methodology today", False)
 
 # plotting_data.stacked_area(timeseries, "I felt confident in working with the methodology today")
 
@@ -244,7 +440,5 @@ fig2 = plotting_data.stacked_area(count_timeseries, "I felt confident in working
 """
 
 
-
-
-        
-
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import timeseries
+
+N_BOOTSTRAP = 2000  # resamples per comparison
+CONFIDENCE = 0.95
+SEED = 2024         # same seed -> same confidence intervals, whatever the number of workers
+ALL_STUDENTS = "all_students"
+# normal approximation with tie correction; with Likert ties scipy's "auto" falls back to a slow permutation test
+WILCOXON_METHOD = "approx"
+
+RESULT_COLUMNS = [
+    "n", "median_before", "median_after",
+    "median_shift", "median_ci_low", "median_ci_high",
+    "mean_shift", "mean_ci_low", "mean_ci_high",
+    "wilcoxon_stat", "p_value",
+]
+
+
+def paired_jobs(panel: timeseries.Panel, pairs=None) -> tuple[list, list]:
+    """
+    Matched answers for every education group (plus all students), question and week pair.
+    Returns (keys, [(before, after), ...]) with only respondents who answered in both weeks.
+    """
+    weeks = panel.weeks
+    pairs = list(combinations(weeks, 2)) if pairs is None else list(pairs)
+
+    keys, jobs = [], []
+    for a, b in pairs:
+        w0, w1 = weeks.index(a), weeks.index(b)
+        before = panel.values[:, w0, :]
+        after = panel.values[:, w1, :]
+        both = ~(np.ma.getmaskarray(before) | np.ma.getmaskarray(after))  # (respondent, question)
+
+        # group by the education group in the first week of the pair
+        groups = [(ALL_STUDENTS, np.ones(len(panel.ids), dtype=bool))] + [
+            (edu, panel.education[:, w0] == e) for e, edu in enumerate(panel.educations)
+        ]
+        for edu, in_group in groups:
+            for q, question in enumerate(panel.questions):
+                rows = both[:, q] & in_group
+                keys.append((edu, question, a, b))
+                jobs.append((before.data[rows, q].astype(np.float64), after.data[rows, q].astype(np.float64)))
+    return keys, jobs
+
+
+def bootstrap_shift(before: np.ndarray, after: np.ndarray, seed, n_boot: int = N_BOOTSTRAP,
+                    confidence: float = CONFIDENCE) -> list:
+    """
+    Wilcoxon signed-rank test plus bootstrap confidence intervals for the shift
+    in median and mean of one set of matched answers.
+    All resamples are drawn and reduced as one (n_boot, n) array.
+    """
+    n = len(before)
+    if n == 0:
+        return [0] + [np.nan] * (len(RESULT_COLUMNS) - 1)
+
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, n, size=(n_boot, n))
+    median_shifts = np.median(after[idx], axis=1) - np.median(before[idx], axis=1)
+    mean_shifts = (after - before)[idx].mean(axis=1)
+
+    tail = (1 - confidence) / 2 * 100
+    median_ci = np.percentile(median_shifts, [tail, 100 - tail])
+    mean_ci = np.percentile(mean_shifts, [tail, 100 - tail])
+
+    if np.any(after != before):
+        test = stats.wilcoxon(after, before, method=WILCOXON_METHOD)
+        statistic, p_value = float(test.statistic), float(test.pvalue)
+    else:
+        # no differences at all, the test is undefined
+        statistic, p_value = np.nan, np.nan
+
+    median_before, median_after = np.median(before), np.median(after)
+    return [
+        n, median_before, median_after,
+        median_after - median_before, median_ci[0], median_ci[1],
+        float(np.mean(after - before)), mean_ci[0], mean_ci[1],
+        statistic, p_value,
+    ]
+
+
+def _run_job(job) -> list:
+    (before, after), seed, n_boot, confidence = job
+    return bootstrap_shift(before, after, seed, n_boot, confidence)
+
+
+def paired_tests(data, pairs=None, n_boot: int = N_BOOTSTRAP, confidence: float = CONFIDENCE,
+                 seed: int = SEED, max_workers=None) -> pd.DataFrame:
+    """
+    Paired comparisons of every question, week pair and education group on matched Anon_IDs.
+    Pairs default to all combinations of weeks (e.g. Week 5 vs Week 9).
+    Each comparison gets its own child seed, and the comparisons are spread over a
+    process pool (max_workers=1 runs them in this process).
+    """
+    panel = timeseries.as_panel(data)
+    keys, matched = paired_jobs(panel, pairs)
+    seeds = np.random.SeedSequence(seed).spawn(len(matched))
+    jobs = [(m, s, n_boot, confidence) for m, s in zip(matched, seeds)]
+
+    if max_workers == 1 or len(jobs) <= 1:
+        results = [_run_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_run_job, jobs, chunksize=max(1, len(jobs) // 32)))
+
+    index = pd.MultiIndex.from_tuples(keys, names=["education", "question", "week_from", "week_to"])
+    return pd.DataFrame(results, index=index, columns=RESULT_COLUMNS).astype({"n": int})
@@ -1,7 +1,12 @@
 import matplotlib.pyplot as plt
+import pandas as pd
 import plotly.graph_objects as go
+from plotly.colors import make_colorscale, sample_colorscale
+from plotly.subplots import make_subplots
 import numpy as np
 
+import aggregates
+
 
 def butterfly(counted_df):
 
@@ -61,83 +66,112 @@ def butterfly(counted_df):
 # Stacked Area Chart
 # ----------------------------------------------------------
 
-def stacked_area(counted_df,question):
-    """ Create a stacked area chart with plotly. Use a counted dataframe as input. """
-
-    # Colors from https://coolors.co/8d2a2a-c74444-ee6d6d-7a9acd-436db1-325285
-    # #8d2a2a, #c74444, #ee6d6d, #7a9acd, #436db1, #325285
-
-    weeks = counted_df.columns.tolist()
-    index = counted_df.index.tolist()
-    x = list(weeks)
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=x, y=counted_df.iloc[0,:].to_numpy(),
-        name=index[0],
-        text=index[0],
-        hoverinfo='y+text',
-        mode='lines',
-        line=dict(width=0.5, color='#8d2a2a'),
-        stackgroup='one', # define stack group
-        groupnorm='percent' # sets the normalization for the sum of the stackgroup
-    ))
-    fig.add_trace(go.Scatter(
-        x=x, y=counted_df.iloc[1,:].to_numpy(),
-        name=index[1],
-        text=index[1],
-        hoverinfo='y+text',
-        mode='lines',
-        line=dict(width=0.5, color='#c74444'),
-        stackgroup='one'
-    ))
-    fig.add_trace(go.Scatter(
-        x=x, y=counted_df.iloc[2,:].to_numpy(),
-        name=index[2],
-        text=index[2],
-        hoverinfo='y+text',
-        mode='lines',
-        line=dict(width=0.5, color='#ee6d6d'),
-        stackgroup='one'
-    ))
-    fig.add_trace(go.Scatter(
-        x=x, y=counted_df.iloc[3,:].to_numpy(),
-        name=index[3],
-        text=index[3],
-        hoverinfo='y+text',
-        mode='lines',
-        line=dict(width=0.5, color='#7a9acd'),
-        stackgroup='one'
-    ))
-    fig.add_trace(go.Scatter(
-        x=x, y=counted_df.iloc[4,:].to_numpy(),
-        name=index[4],
-        text=index[4],
-        hoverinfo='y+text',
-        mode='lines',
-        line=dict(width=0.5, color='#436db1'),
-        stackgroup='one'
-    ))
-    fig.add_trace(go.Scatter(
-        x=x, y=counted_df.iloc[5,:].to_numpy(),
-        name=index[5],
-        text=index[5],
-        hoverinfo='y+text',
-        mode='lines',
-        line=dict(width=0.5, color='#325285'),
-        stackgroup='one'
-    ))
+# Colors from https://coolors.co/8d2a2a-c74444-ee6d6d-7a9acd-436db1-325285
+AREA_COLORS = ["#8d2a2a", "#c74444", "#ee6d6d", "#7a9acd", "#436db1", "#325285"]
+WEBGL_POINTS = 5000  # switch to Scattergl when a figure has more points than this
+
+
+def area_colors(n: int) -> list:
+    """ n colors spread over AREA_COLORS, so any number of Likert levels gets the red-to-blue scale. """
+    if n == len(AREA_COLORS):
+        return list(AREA_COLORS)
+    return sample_colorscale(make_colorscale(AREA_COLORS), n) if n > 1 else AREA_COLORS[:1]
+
+
+def area_counts(counts, questions=None, level_labels=None):
+    """
+    Bring the supported inputs to (counts, x, level labels, question labels, group labels)
+    with counts shaped (group, question, level, x).
+    - a counted dataframe (answers x weeks), as made by count_columns
+    - an AggregateCube: every education group, for the given questions
+    - a numpy array shaped (level, x), (question, level, x) or (group, question, level, x)
+    level_labels may be a list or a Likert mapping {label: value}.
+    """
+    if isinstance(level_labels, dict):
+        level_labels = [label for label, _ in sorted(level_labels.items(), key=lambda item: item[1])]
+
+    if isinstance(counts, aggregates.AggregateCube):
+        cube = counts
+        questions = cube.questions if questions is None else questions
+        q = cube.question_index(questions)
+        # levels above the largest answer to these questions are left out
+        value_range = cube.value_range(questions)
+        top = len(level_labels) if level_labels else (value_range[1] if value_range else 1)
+        array = cube.counts[:, :, q, :top].transpose(1, 2, 3, 0)  # (education, question, level, week)
+        if array.shape[2] < top:
+            # a scale longer than the cube: its extra levels were never answered
+            pad = np.zeros(array.shape[:2] + (top - array.shape[2],) + array.shape[3:], dtype=array.dtype)
+            array = np.concatenate([array, pad], axis=2)
+        labels = level_labels or [str(level) for level in range(1, top + 1)]
+        return array, cube.weeks, labels, list(questions), cube.educations
+
+    if isinstance(counts, pd.DataFrame):
+        array = counts.to_numpy()[None, None]
+        labels = level_labels or [str(label) for label in counts.index]
+        return array, counts.columns.tolist(), labels, list(questions or [None]), [None]
+
+    array = np.asarray(counts)
+    array = array.reshape((1,) * (4 - array.ndim) + array.shape)
+    labels = level_labels or [str(level) for level in range(1, array.shape[2] + 1)]
+    return array, list(range(array.shape[3])), labels, list(questions or [None] * array.shape[1]), [None] * array.shape[0]
+
+
+def stacked_area(counted_df, question=None, level_labels=None, groups=None, webgl=None):
+    """
+    Create a stacked area chart with plotly, one panel per question (rows) and group (columns).
+    counted_df is a counted dataframe, an AggregateCube or a count array, see area_counts.
+    Every Likert level gets a trace whatever the scale length; the shares are
+    computed from the counts here, so the traces can also be drawn with Scattergl
+    (webgl=None picks it for large figures). The figure is returned, not shown.
+    """
+    questions = [question] if isinstance(question, str) else question
+    counts, x, labels, questions, group_labels = area_counts(counted_df, questions, level_labels)
+    if len(labels) != counts.shape[2]:
+        raise ValueError(f"{len(labels)} level labels for {counts.shape[2]} levels of counts")
+    if groups is not None:
+        keep = [group_labels.index(group) for group in groups]
+        counts, group_labels = counts[keep], [group_labels[g] for g in keep]
+    n_groups, n_questions, n_levels, n_x = counts.shape
+
+    # percent of the answers per level and x, then stacked; empty columns stay at 0
+    total = counts.sum(axis=2, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shares = np.where(total > 0, counts / total * 100, 0.0)
+    tops = shares.cumsum(axis=2)
+
+    if webgl is None:
+        webgl = counts.size > WEBGL_POINTS
+    scatter = go.Scattergl if webgl else go.Scatter
+    colors = area_colors(n_levels)
+
+    fig = make_subplots(
+        rows=n_questions, cols=n_groups,
+        shared_xaxes=True, shared_yaxes=True,
+        column_titles=[str(g) for g in group_labels] if n_groups > 1 else None,
+        row_titles=[str(q) for q in questions] if n_questions > 1 else None,
+    )
+    for g in range(n_groups):
+        for q in range(n_questions):
+            for level, (label, color) in enumerate(zip(labels, colors)):
+                fig.add_trace(scatter(
+                    x=x, y=tops[g, q, level],
+                    customdata=shares[g, q, level],
+                    name=label,
+                    legendgroup=label,
+                    showlegend=g == 0 and q == 0,
+                    hovertemplate="%{customdata:.1f}%<extra>" + label + "</extra>",
+                    mode='lines',
+                    line=dict(width=0.5, color=color),
+                    fill='tozeroy' if level == 0 else 'tonexty',
+                    fillcolor=color,
+                ), row=q + 1, col=g + 1)
 
     fig.update_layout(
-    title = question,
-    showlegend=True,
-    xaxis_type='category',
-    yaxis=dict(
-        type='linear',
-        range=[0, 100],
-        ticksuffix='%'))
-    # fig.update_layout(yaxis_range=(0, 100))
-    
-    fig.show()
+        title=question if isinstance(question, str) else None,
+        showlegend=True,
+        height=max(450, 250 * n_questions),
+    )
+    fig.update_xaxes(type='category')
+    fig.update_yaxes(type='linear', range=[0, 100], ticksuffix='%')
 
     return fig
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import operator
+from pathlib import Path
+
+import pandas as pd
+
+# Parquet copies of the anonymised workbooks
+CACHE_DIR = Path("data/cache")
+
+# operators allowed in filters, same form as pyarrow: [(column, op, value), ...]
+FILTER_OPS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "in": lambda col, values: col.isin(values),
+}
+
+
+def cache_key(path: Path, columns) -> str:
+    """ Key a cached file by path, size, mtime and the selected columns. """
+    stat = path.stat()
+    key = json.dumps([str(path.resolve()), stat.st_size, stat.st_mtime_ns, list(columns or [])])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def apply_filters(df: pd.DataFrame, filters) -> pd.DataFrame:
+    """ Apply pyarrow-style filters to a dataframe that is already in memory. """
+    if not filters:
+        return df
+    mask = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        mask &= FILTER_OPS[op](df[col], value)
+    return df[mask].reset_index(drop=True)
+
+
+def read_excel_cached(path: Path, columns=None, filters=None, cache_dir: Path = CACHE_DIR) -> pd.DataFrame:
+    """
+    Read a workbook through a Parquet cache.
+    The first read parses only the selected columns of the xlsx and stores them
+    as Parquet; later reads of the same unchanged file load the Parquet copy instead.
+    Filters are pushed down into the Parquet read, so only matching rows are loaded.
+    """
+    path = Path(path)
+    cached = cache_dir / f"{path.stem}-{cache_key(path, columns)}.parquet"
+
+    if cached.exists():
+        return pd.read_parquet(cached, filters=filters or None)
+
+    df = pd.read_excel(path, usecols=list(columns) if columns is not None else None)
+    if columns is not None:
+        df = df[list(columns)]
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(cached, index=False)
+    except (ImportError, ValueError, TypeError) as e:
+        # fx pyarrow ikke installeret eller kolonner med blandede typer
+        print(f"Could not cache {path}: {e}")
+        cached.unlink(missing_ok=True)
+        return apply_filters(df, filters)
+
+    # fjern gamle kopier af samme fil
+    for old in cache_dir.glob(f"{path.stem}-*.parquet"):
+        if old != cached:
+            old.unlink(missing_ok=True)
+
+    return apply_filters(df, filters)
+
+
+def read_table(path: Path, columns=None, filters=None) -> pd.DataFrame:
+    """
+    Read only the given columns and matching rows of an anonymised week file.
+    Parquet files (see id_mapping.OUTPUT_FORMAT) are read directly; workbooks go through the cache.
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path, columns=list(columns) if columns is not None else None,
+                               filters=filters or None)
+    return read_excel_cached(path, columns, filters)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+# Number of enrolled students per study line, e.g. {"archeng": 40, "arch": 35, "oth": 20}.
+# Leave empty to skip the rate-of-enrolment sheet.
+ENROLMENT = {}
+
+
+def study_line(education: str) -> str:
+    """ 'archeng_students' -> 'archeng' """
+    return education.split("_")[0]
+
+
+def presence(long: pd.DataFrame):
+    """
+    Which respondent answered which week, from one pass over the
+    (education, week, Anon_ID) keys of the long survey table.
+    Returns (study lines, week numbers, row study-line codes, rows x weeks bool array).
+    """
+    education = long["education"].cat.remove_unused_categories()
+    anon_id = long["Anon_ID"].cat.remove_unused_categories()
+    week = long["week"].cat.remove_unused_categories()
+
+    # study lines in order of first appearance, like the flat data keys
+    lines = list(dict.fromkeys(study_line(str(edu)) for edu in pd.unique(education)))
+    line_of_edu = np.array([lines.index(study_line(str(edu))) for edu in education.cat.categories])
+
+    e = line_of_edu[education.cat.codes.to_numpy()] if len(long) else np.array([], dtype=int)
+    a = anon_id.cat.codes.to_numpy()
+    w = week.cat.codes.to_numpy()
+    n_ids = max(len(anon_id.cat.categories), 1)
+
+    rows, row_of = np.unique(e.astype(np.int64) * n_ids + a, return_inverse=True)
+    present = np.zeros((len(rows), len(week.cat.categories)), dtype=bool)
+    present[row_of, w] = True
+
+    weeks = [int(wk) for wk in week.cat.categories]
+    return lines, weeks, rows // n_ids, present
+
+
+def response_tables(long: pd.DataFrame, enrolment: dict | None = None) -> dict:
+    """
+    Response counts, rates against enrolment and week-to-week retention per study line.
+    Returns {sheet name: dataframe}, ready for write_excel.
+    """
+    lines, weeks, line_of_row, present = presence(long)
+    week_labels = [f"Week{wk}" for wk in weeks]
+
+    counts = np.zeros((len(lines), len(weeks)), dtype=np.int64)
+    np.add.at(counts, line_of_row, present)
+
+    # answered both week i and week i+1
+    retained = np.zeros((len(lines), max(len(weeks) - 1, 0)), dtype=np.int64)
+    np.add.at(retained, line_of_row, present[:, :-1] & present[:, 1:])
+
+    resp_df = pd.DataFrame(counts, index=lines, columns=week_labels)
+    resp_df.loc["Total"] = resp_df.sum()
+    tables = {"Response Rates": resp_df}
+
+    enrolment = ENROLMENT if enrolment is None else enrolment
+    if enrolment:
+        enrolled = pd.Series(enrolment, dtype="float64").reindex(resp_df.index)
+        enrolled["Total"] = enrolled.drop("Total").sum(min_count=1)
+        tables["Rate of Enrolment"] = resp_df.div(enrolled, axis=0)
+
+    pair_labels = [f"{a}-{b}" for a, b in zip(week_labels[:-1], week_labels[1:])]
+    retained_df = pd.DataFrame(retained, index=lines, columns=pair_labels)
+    retained_df.loc["Total"] = retained_df.sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tables["Retention"] = retained_df / resp_df.iloc[:, :-1].to_numpy()
+
+    return tables
+
+
+def write_excel(tables: dict, path) -> None:
+    """ Write each table to its own sheet of one workbook. """
+    with pd.ExcelWriter(path) as writer:
+        for sheet_name, table in tables.items():
+            table.to_excel(writer, sheet_name=sheet_name, index=True)
@@ -1,35 +1,41 @@
+import numpy as np
 import pandas as pd
 
+MASTERS_COL = "What master's programme do you follow?"
+BACHELORS_COL = "What bachelor's programme did you follow?"
+STILL_ON_BACHELORS = "I am still on my bachelor's"
+
+
+def education_column(df):
+    """
+    Education group of every row as a categorical column.
+    For bachelor students, uses their bachelor program.
+    For others, uses their master's program.
+    """
+    masters = df[MASTERS_COL].to_numpy(dtype=object)
+    program = np.where(masters == STILL_ON_BACHELORS, df[BACHELORS_COL].to_numpy(dtype=object), masters)
+
+    # categories in order of first appearance, like unique()
+    categories = pd.unique(pd.Series(program).dropna())
+    return pd.Series(pd.Categorical(program, categories=categories), index=df.index, name="education")
+
+
+def education_group_indices(df):
+    """ Positional row indices of each education group, from a single groupby. """
+    education = education_column(df)
+    return education.groupby(education, observed=True, sort=False).indices
+
+
 def create_education_groups(df):
     """
     Creates a dictionary of dataframes grouped by education program.
     For bachelor students, uses their bachelor program.
     For others, uses their master's program.
     """
-    
-    # Make a copy to avoid SettingWithCopyWarning
-    df_copy = df.copy()
-
-    # Create a new column that determines the grouping key
-    def get_program(row):
-        masters_col = "What master's programme do you follow?"
-        bachelors_col = "What bachelor's programme did you follow?"
-        
-        if row[masters_col] == "I am still on my bachelor's":
-            return row[bachelors_col]
-        else:
-            return row[masters_col]
-    
-    df_copy['_education_group'] = df_copy.apply(get_program, axis=1)
-    
-    # Create dictionary of dataframes grouped by education program
-    education_dict = {}
-    for program in df_copy['_education_group'].unique():
-        education_dict[program] = df_copy[df_copy['_education_group'] == program].copy()
-        # Remove the temporary grouping column from each dataframe
-        education_dict[program] = education_dict[program].drop('_education_group', axis=1)
-    
-    return education_dict
+    return {
+        program: df.take(rows)
+        for program, rows in education_group_indices(df).items()
+    }
 
 
 
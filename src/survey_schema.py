@@ -0,0 +1,87 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+import likert_conversion
+
+# Questions, constructs and Likert scales of the survey
+SCHEMA_FILE = Path(__file__).with_name("survey_schema.json")
+
+
+class QuestionInfo(NamedTuple):
+    construct: str   # e.g. "MOTIVATION"
+    scale: str       # name of the Likert scale, e.g. "likert_6pt"
+    number: int      # 1-based question number, as used in the figure names
+
+
+class Schema:
+    """
+    The survey schema compiled into lookups.
+    index maps every question to its QuestionInfo, so finding the construct
+    or scale of a question does not scan the question lists.
+    """
+
+    def __init__(self, raw: dict):
+        self.consent = raw["consent"]
+        self.info = list(raw["info"]) + [self.consent]
+        self.education = list(raw["education"])
+        self.scales = {name: dict(mapping) for name, mapping in raw["scales"].items()}
+        # number of levels on the longest scale, e.g. 7; arrays over answers are sized by it
+        self.levels = max(max(mapping.values()) for mapping in self.scales.values())
+        self.reverse_scales = {
+            name: {v: k for k, v in mapping.items()} for name, mapping in self.scales.items()
+        }
+
+        self.constructs = {}
+        question_scales = {}
+        for construct, spec in raw["constructs"].items():
+            questions = []
+            for question in spec["questions"]:
+                # a question is either its text (construct scale) or {"text": ..., "scale": ...}
+                if isinstance(question, str):
+                    text, scale = question, spec["scale"]
+                else:
+                    text, scale = question["text"], question.get("scale", spec.get("scale"))
+                if scale not in self.scales:
+                    raise ValueError(f"Unknown scale {scale!r} for question {text!r}")
+                questions.append(text)
+                question_scales[text] = (construct, scale)
+            self.constructs[construct] = questions
+
+        self.questions = [q for questions in self.constructs.values() for q in questions]
+        self.include_in_df = self.info + self.education + self.questions
+
+        self.index = {
+            q: QuestionInfo(construct, scale, number)
+            for number, (q, (construct, scale)) in enumerate(question_scales.items(), start=1)
+        }
+
+        self.question_groups = {
+            name: dict(group, questions=list(group["questions"]))
+            for name, group in raw.get("question_groups", {}).items()
+        }
+
+    def scale_name(self, question: str) -> str:
+        return self.index[question].scale
+
+    def scale(self, question: str) -> dict:
+        """ Likert mapping (text -> number) of a question. """
+        return self.scales[self.index[question].scale]
+
+    def reverse_scale(self, question: str) -> dict:
+        """ Likert mapping (number -> text) of a question. """
+        return self.reverse_scales[self.index[question].scale]
+
+    def number(self, question: str) -> int:
+        return self.index[question].number
+
+    def encoder(self) -> likert_conversion.LikertEncoder:
+        return likert_conversion.LikertEncoder({q: self.scale(q) for q in self.questions})
+
+
+@lru_cache(maxsize=None)
+def load_schema(path: Path = SCHEMA_FILE) -> Schema:
+    """ Read and compile the schema file once per process. """
+    with open(path, encoding="utf-8") as f:
+        return Schema(json.load(f))
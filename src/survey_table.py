@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+# Columns of the long survey table
+LONG_COLUMNS = ["week", "education", "Anon_ID", "question", "value"]
+
+
+def to_long(flat_data: dict, questions: list[str]) -> pd.DataFrame:
+    """
+    Convert {'<education>_Week<N>': df} (or {'Week<N>': df}) into one tidy table with the columns
+    week, education, Anon_ID, question and value.
+    week, education, Anon_ID and question are categoricals and value is a
+    nullable Int8, so the table is a fraction of the size of the wide frames.
+    One row per respondent and question; unanswered questions are <NA>.
+    """
+    weeks, edus, ids, values = [], [], [], []
+    n_q = len(questions)
+
+    for key, df in flat_data.items():
+        # 'Week5' (all respondents) or '<education>_Week5'
+        education, _, week = key.rpartition("Week")
+        education = education.rstrip("_") or "all"
+        n = len(df)
+        block = df.reindex(columns=questions).to_numpy(dtype="float64", na_value=np.nan)
+
+        weeks.append(np.full(n * n_q, int(week), dtype=np.int16))
+        edus.append(np.full(n * n_q, education, dtype=object))
+        ids.append(np.repeat(df["Anon_ID"].astype(str).to_numpy(), n_q))
+        values.append(block.ravel())
+
+    if not values:
+        return empty_long(questions)
+
+    value = np.concatenate(values)
+    question_codes = np.tile(np.arange(n_q), len(value) // max(n_q, 1))
+    week = np.concatenate(weeks)
+
+    return pd.DataFrame({
+        "week": pd.Categorical(week, categories=sorted(set(week.tolist())), ordered=True),
+        "education": pd.Categorical(np.concatenate(edus)),
+        "Anon_ID": pd.Categorical(np.concatenate(ids)),
+        "question": pd.Categorical.from_codes(question_codes, categories=questions),
+        "value": pd.array(value, dtype="Int8"),
+    })
+
+
+def empty_long(questions: list[str]) -> pd.DataFrame:
+    return pd.DataFrame({
+        "week": pd.Categorical([], ordered=True),
+        "education": pd.Categorical([]),
+        "Anon_ID": pd.Categorical([]),
+        "question": pd.Categorical([], categories=questions),
+        "value": pd.array([], dtype="Int8"),
+    })
+
+
+def is_long(data) -> bool:
+    return isinstance(data, pd.DataFrame) and set(LONG_COLUMNS).issubset(data.columns)
+
+
+def to_nested(long: pd.DataFrame) -> dict:
+    """
+    Convert the long table back to {week: {education: wide df}} with an Anon_ID
+    column and one float column per question, as the plotting functions expect.
+    """
+    nested = {}
+    for (week, education), grp in long.groupby(["week", "education"], observed=True, sort=True):
+        # respondents who answered twice in a week keep separate rows
+        occurrence = grp.groupby(["Anon_ID", "question"], observed=True).cumcount().to_numpy()
+        wide = (
+            grp.assign(_n=occurrence, value=grp["value"].astype("float64"))
+            .pivot(index=["Anon_ID", "_n"], columns="question", values="value")
+        )
+        wide.columns = [str(col) for col in wide.columns]
+        wide = wide.reset_index().drop(columns="_n")
+        wide["Anon_ID"] = wide["Anon_ID"].astype(str)
+        nested.setdefault(int(week), {})[str(education)] = wide
+    return nested
+
+
+def as_nested(data) -> dict:
+    """
+    Accept either the nested dict or the long table.
+    The long table is pivoted on every call; code that plots the same data
+    repeatedly should use Dataset.nested, which is built once.
+    """
+    if is_long(data):
+        return to_nested(data)
+    return data
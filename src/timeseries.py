@@ -1,20 +1,87 @@
+import numpy as np
 import pandas as pd
-from functools import reduce
+from typing import NamedTuple
 
-def time_series_df(dfs, question, index_by, to_excel=False):
-    """ Create a dataframe for each question to see progression of answers over time. """
+import survey_table
 
-    week_dfs = []
 
-    # time_series = dataframe.groupby(index_by)[question].value_counts(normalize=True).unstack().fillna(0)
-    for week_name, df in dfs.items():
-        week_dfs.append(df[[index_by, question]].rename(columns={question: week_name}))
+class Panel(NamedTuple):
+    """ Answers of every tracked respondent, indexed by Anon_ID, week and question. """
+    ids: np.ndarray               # Anon_ID of each row
+    weeks: list                   # week numbers
+    questions: list               # question texts
+    values: np.ma.MaskedArray     # (respondent, week, question), masked where there is no answer
+    education: np.ndarray         # (respondent, week) code into educations, -1 where not answered
+    educations: list              # education group names
 
-    time_series = reduce(lambda left, right: pd.merge(left, right, on=index_by, how="outer"), week_dfs).fillna(0)
 
-    time_series = time_series.sort_values(index_by).reset_index(drop=True)
+def build_panel(long: pd.DataFrame) -> Panel:
+    """
+    Pivot all questions of the long survey table at once into a dense
+    respondent x week x question array. Missing answers stay masked.
+    If a respondent answered a question twice in one week, the last given answer is kept.
+    """
+    anon_id = long["Anon_ID"].cat.remove_unused_categories()
+    week = long["week"].cat.remove_unused_categories()
+    education = long["education"].cat.remove_unused_categories()
+    question = long["question"]
+
+    a = anon_id.cat.codes.to_numpy()
+    w = week.cat.codes.to_numpy()
+    q = question.cat.codes.to_numpy()
+    shape = (len(anon_id.cat.categories), len(week.cat.categories), len(question.cat.categories))
+
+    value = long["value"]
+    codes = pd.DataFrame({"a": a, "w": w, "q": q})
+
+    # one answer per cell before scattering: with repeated indices numpy does not
+    # guarantee which assignment wins, so the last answer is picked explicitly
+    answered = np.flatnonzero(value.notna().to_numpy())
+    last = answered[~codes.iloc[answered].duplicated(keep="last").to_numpy()]
+
+    data = np.zeros(shape, dtype=np.int8)
+    mask = np.ones(shape, dtype=bool)
+    data[a[last], w[last], q[last]] = value.to_numpy(dtype=np.int8, na_value=0)[last]
+    mask[a[last], w[last], q[last]] = False
+
+    # education group of the respondent's last row in each week
+    rows = np.flatnonzero(~codes.duplicated(subset=["a", "w"], keep="last").to_numpy())
+    edu = np.full(shape[:2], -1, dtype=np.int8)
+    edu[a[rows], w[rows]] = education.cat.codes.to_numpy()[rows]
+
+    return Panel(
+        ids=np.asarray(anon_id.cat.categories, dtype=object),
+        weeks=[int(wk) for wk in week.cat.categories],
+        questions=[str(qu) for qu in question.cat.categories],
+        values=np.ma.MaskedArray(data, mask=mask),
+        education=edu,
+        educations=[str(e) for e in education.cat.categories],
+    )
+
+
+def as_panel(data, questions=None) -> Panel:
+    """ Accept a Panel, the long survey table or {'<education>_Week<N>': df}. """
+    if isinstance(data, Panel):
+        return data
+    if not survey_table.is_long(data):
+        data = survey_table.to_long(data, questions)
+    return build_panel(data)
+
+
+def time_series_df(dfs, question, to_excel=False):
+    """ Create a dataframe for each question to see progression of answers over time, one row per Anon_ID. """
+
+    panel = as_panel(dfs, [question])
+    q = panel.questions.index(question)
+
+    # weeks without an answer stay empty (NaN); 0 is not on the Likert scale
+    answers = panel.values[:, :, q].astype("float64").filled(np.nan)
+    time_series = pd.DataFrame(answers, columns=[f"Week{w}" for w in panel.weeks])
+    time_series.insert(0, "Anon_ID", panel.ids)
+
+    time_series = time_series.sort_values("Anon_ID").reset_index(drop=True)
 
     if to_excel:
         time_series.to_excel("data/combined_qs/" + str(question)+".xlsx", index=False)
 
-    return time_series
\ No newline at end of file
+    return time_series
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from typing import NamedTuple
+
+import survey_schema
+import timeseries
+
+CHANGE_LABELS = ["declined", "stable", "improved"]
+
+
+class Transitions(NamedTuple):
+    """ Week-to-week changes of tracked respondents, for every question, week pair and education group. """
+    questions: list       # question texts
+    pairs: list           # [(from week, to week), ...]
+    educations: list      # education group of the respondent in the from week
+    levels: int           # answers are 1..levels
+    matrices: np.ndarray  # (education, question, pair, from answer, to answer) counts
+    change: np.ma.MaskedArray  # (respondent, pair, question) to answer - from answer
+    shares: pd.DataFrame  # declined/stable/improved shares per education, question and pair
+
+
+def week_pairs(weeks: list) -> list:
+    """ Consecutive week pairs, e.g. [(5, 6), (6, 7), ...]. """
+    return list(zip(weeks[:-1], weeks[1:]))
+
+
+def compute_transitions(data, pairs=None, levels=None) -> Transitions:
+    """
+    Transition matrices, change scores and declined/stable/improved shares for
+    respondents who answered a question in both weeks of a pair.
+    All questions and week pairs are counted in one batched bincount.
+    "Improved" means the answer went up on its scale.
+    levels defaults to the longest scale in the survey schema, so answers nobody
+    gave still get their rows and columns in the matrices.
+    """
+    panel = timeseries.as_panel(data)
+    weeks = panel.weeks
+    pairs = week_pairs(weeks) if pairs is None else list(pairs)
+    if levels is None:
+        answered = int(panel.values.max()) if panel.values.count() else 0
+        levels = max(survey_schema.load_schema().levels, answered)
+
+    w0 = np.array([weeks.index(a) for a, _ in pairs], dtype=np.intp)
+    w1 = np.array([weeks.index(b) for _, b in pairs], dtype=np.intp)
+
+    before = panel.values[:, w0, :]  # (respondent, pair, question)
+    after = panel.values[:, w1, :]
+    change = after.astype(np.int16) - before.astype(np.int16)
+    tracked = ~np.ma.getmaskarray(change)
+
+    n_edu, n_q, n_pairs = len(panel.educations), len(panel.questions), len(pairs)
+    edu = np.broadcast_to(panel.education[:, w0][:, :, None], change.shape)
+    pair = np.broadcast_to(np.arange(n_pairs)[None, :, None], change.shape)
+    question = np.broadcast_to(np.arange(n_q)[None, None, :], change.shape)
+
+    e, p, q = edu[tracked].astype(np.intp), pair[tracked], question[tracked]
+    a = before.data[tracked].astype(np.intp) - 1
+    b = after.data[tracked].astype(np.intp) - 1
+
+    # one flat index per (education, question, pair, from, to)
+    cell = (((e * n_q + q) * n_pairs + p) * levels + a) * levels + b
+    matrices = np.bincount(cell, minlength=n_edu * n_q * n_pairs * levels * levels)
+    matrices = matrices.reshape(n_edu, n_q, n_pairs, levels, levels)
+
+    # -1/0/+1 -> declined/stable/improved
+    direction = np.sign(change.data[tracked]).astype(np.intp) + 1
+    group = (e * n_q + q) * n_pairs + p
+    counts = np.bincount(group * 3 + direction, minlength=n_edu * n_q * n_pairs * 3)
+    counts = counts.reshape(n_edu * n_q * n_pairs, 3)
+
+    index = pd.MultiIndex.from_product(
+        [panel.educations, panel.questions, [f"Week{a}-Week{b}" for a, b in pairs]],
+        names=["education", "question", "weeks"],
+    )
+    n = counts.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shares = pd.DataFrame(counts / n[:, None], index=index, columns=CHANGE_LABELS)
+    shares["n"] = n
+
+    return Transitions(
+        questions=panel.questions,
+        pairs=pairs,
+        educations=panel.educations,
+        levels=levels,
+        matrices=matrices,
+        change=change,
+        shares=shares,
+    )
+
+
+def transition_matrix(transitions: Transitions, question: str, pair: tuple, education=None) -> pd.DataFrame:
+    """ Counts from answer (rows) to answer (columns) for one question and week pair. """
+    q = transitions.questions.index(question)
+    p = transitions.pairs.index(tuple(pair))
+    if education is None:
+        matrix = transitions.matrices[:, q, p].sum(axis=0)
+    else:
+        matrix = transitions.matrices[transitions.educations.index(education), q, p]
+    labels = range(1, transitions.levels + 1)
+    return pd.DataFrame(matrix, index=pd.Index(labels, name=f"Week{pair[0]}"),
+                        columns=pd.Index(labels, name=f"Week{pair[1]}"))
@@ -1,8 +1,11 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 
+import aggregates
+import survey_table
+import transitions
+
 # Set style
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (14, 8)
@@ -62,86 +65,63 @@ def restructure_flat_dict(flat_dict):
 
 def plot_question_over_time(dataframes_dict, question_col, title=None):
     """
-    Plot a single question's responses over time, grouped by education.
+    Plot a question's responses over time, grouped by education.
     Shows median with interquartile range (IQR).
+    Accepts the nested dict, the long survey table or an AggregateCube.
+    question_col may also be a list of questions; the quartiles of all of them
+    are computed together and a {question: fig} dict is returned.
     """
-    fig, ax = plt.subplots(figsize=(12, 6))
-    
-    weeks = sorted(dataframes_dict.keys())
-    education_programs = set()
-    for week_data in dataframes_dict.values():
-        education_programs.update(week_data.keys())
-
-    # Collect all values to determine y-axis range
-    all_values = []
-    for week in weeks:
-        for edu in education_programs:
-            if edu in dataframes_dict[week] and question_col in dataframes_dict[week][edu].columns:
-                values = dataframes_dict[week][edu][question_col].dropna()
-                all_values.extend(values.tolist())
-    
-    # Determine y-axis range from actual data
-    if all_values:
-        y_min = int(min(all_values))
-        y_max = int(max(all_values))
-        y_ticks = range(y_min, y_max + 1)
-    else:
-        y_min, y_max = 1, 6
-        y_ticks = range(1, 7)
-    
+    questions = [question_col] if isinstance(question_col, str) else list(question_col)
+    cube = aggregates.as_cube(dataframes_dict, questions)
+
+    weeks = cube.weeks
+    education_programs = cube.educations
     colors = sns.color_palette("husl", len(education_programs))
-    
-    for edu, color in zip(sorted(education_programs), colors):
-        medians = []
-        q1s = []
-        q3s = []
-        ns = []
-        
-        for week in weeks:
-            if edu in dataframes_dict[week] and question_col in dataframes_dict[week][edu].columns:
-                df = dataframes_dict[week][edu]
-                values = df[question_col].dropna()
-                
-                if len(values) > 0:
-                    medians.append(values.median())
-                    q1s.append(values.quantile(0.25))
-                    q3s.append(values.quantile(0.75))
-                    ns.append(len(values))
-                else:
-                    medians.append(np.nan)
-                    q1s.append(np.nan)
-                    q3s.append(np.nan)
-                    ns.append(0)
-            else:
-                medians.append(np.nan)
-                q1s.append(np.nan)
-                q3s.append(np.nan)
-                ns.append(0)
-        
-        # Plot median line
-        ax.plot(
-            weeks, medians,
-            marker='o', label=edu,
-            color=color, linewidth=2, markersize=8
-        )
-        
-        # Plot IQR band (Q1–Q3)
-        ax.fill_between(
-            weeks, q1s, q3s,
-            alpha=0.25, color=color
-        )
-    
-    ax.set_xlabel('Week', fontsize=12)
-    ax.set_ylabel('Median Score', fontsize=12)
-    ax.set_title(title or question_col, fontsize=14, fontweight='bold')
-    ax.legend(title='Education', bbox_to_anchor=(1.05, 1), loc='upper left')
-    ax.set_xticks(weeks)
-    ax.set_ylim(y_min, y_max)  # Dynamic based on data
-    ax.set_yticks(y_ticks)  # Dynamic tick marks
-    ax.grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    return fig
+
+    # (week, education, question) arrays, NaN where a group has no answers
+    q1s, medians, q3s = cube.quantiles([0.25, 0.5, 0.75])[..., cube.question_index(questions)]
+
+    figs = {}
+    for i, question in enumerate(questions):
+        fig, ax = plt.subplots(figsize=(12, 6))
+
+        # Determine y-axis range from actual data
+        value_range = cube.value_range([question])
+        if value_range:
+            y_min, y_max = value_range
+            y_ticks = range(y_min, y_max + 1)
+        else:
+            y_min, y_max = 1, 6
+            y_ticks = range(1, 7)
+
+        for e, (edu, color) in enumerate(zip(education_programs, colors)):
+            # Plot median line
+            ax.plot(
+                weeks, medians[:, e, i],
+                marker='o', label=edu,
+                color=color, linewidth=2, markersize=8
+            )
+
+            # Plot IQR band (Q1–Q3)
+            ax.fill_between(
+                weeks, q1s[:, e, i], q3s[:, e, i],
+                alpha=0.25, color=color
+            )
+
+        ax.set_xlabel('Week', fontsize=12)
+        ax.set_ylabel('Median Score', fontsize=12)
+        ax.set_title(title if title and isinstance(question_col, str) else question,
+                     fontsize=14, fontweight='bold')
+        ax.legend(title='Education', bbox_to_anchor=(1.05, 1), loc='upper left')
+        ax.set_xticks(weeks)
+        ax.set_ylim(y_min, y_max)  # Dynamic based on data
+        ax.set_yticks(y_ticks)  # Dynamic tick marks
+        ax.grid(True, alpha=0.3)
+
+        plt.tight_layout()
+        figs[question] = fig
+
+    return figs[question_col] if isinstance(question_col, str) else figs
 
 
 def plot_stacked_distribution(dataframes_dict, question_col, week, title=None):
@@ -149,35 +129,23 @@ def plot_stacked_distribution(dataframes_dict, question_col, week, title=None):
     Plot stacked bar chart showing distribution of responses for one question
     across education programs for a specific week.
     """
+    cube = aggregates.as_cube(dataframes_dict, [question_col])
     fig, ax = plt.subplots(figsize=(10, 6))
     
-    if week not in dataframes_dict:
+    if week not in cube.weeks:
         print(f"Week {week} not found in data")
         return None
     
-    edu_programs = sorted(dataframes_dict[week].keys())
+    w = cube.weeks.index(week)
+    q = cube.questions.index(question_col)
+    edu_programs = cube.educations_in([week])
+    e = [cube.educations.index(edu) for edu in edu_programs]
     
-    # Get all possible Likert values
-    all_values = set()
-    for edu in edu_programs:
-        if question_col in dataframes_dict[week][edu].columns:
-            all_values.update(dataframes_dict[week][edu][question_col].dropna().unique())
-    
-    likert_values = sorted(all_values)
-    
-    # Prepare data
-    data = {val: [] for val in likert_values}
-    
-    for edu in edu_programs:
-        if question_col in dataframes_dict[week][edu].columns:
-            counts = dataframes_dict[week][edu][question_col].value_counts()
-            total = counts.sum()
-            for val in likert_values:
-                percentage = (counts.get(val, 0) / total * 100) if total > 0 else 0
-                data[val].append(percentage)
-        else:
-            for val in likert_values:
-                data[val].append(0)
+    # Likert values answered this week, and their share per education program
+    counts = cube.counts[w, e, q]
+    likert_values = [int(v) for v in cube.levels[counts.sum(axis=0) > 0]]
+    percentages = cube.percentages()[w, e, q]
+    data = {val: percentages[:, val - 1] for val in likert_values}
     
     # Create stacked bars
     bottom = np.zeros(len(edu_programs))
@@ -203,21 +171,21 @@ def plot_stacked_distribution_multiweek(
     likert_mapping,  # NEW: Pass the mapping dictionary
     title=None
 ):
+    cube = aggregates.as_cube(dataframes_dict, [question_col])
     # Allow both int and list
     if isinstance(weeks, int):
         weeks = [weeks]
 
-    weeks = [w for w in weeks if w in dataframes_dict]
+    weeks = [w for w in weeks if w in cube.weeks]
     if not weeks:
         print("No valid weeks provided")
         return None
 
     # Find all education programs across weeks
-    edu_programs = sorted({
-        edu
-        for w in weeks
-        for edu in dataframes_dict[w].keys()
-    })
+    edu_programs = cube.educations_in(weeks)
+    e = [cube.educations.index(edu) for edu in edu_programs]
+    q = cube.questions.index(question_col)
+    percentages = cube.percentages()
 
     # Extract likert values and labels from the mapping
     likert_values = sorted(set(likert_mapping.values()))  # Get unique numeric values, sorted
@@ -242,21 +210,12 @@ def plot_stacked_distribution_multiweek(
     for idx, week in enumerate(weeks):
         ax = axes[idx // n_cols][idx % n_cols]
 
-        data = {val: [] for val in likert_values}
-
-        for edu in edu_programs:
-            if (
-                edu in dataframes_dict[week]
-                and question_col in dataframes_dict[week][edu].columns
-            ):
-                counts = dataframes_dict[week][edu][question_col].value_counts()
-                total = counts.sum()
-                for val in likert_values:
-                    pct = (counts.get(val, 0) / total * 100) if total > 0 else 0
-                    data[val].append(pct)
-            else:
-                for val in likert_values:
-                    data[val].append(0)
+        # groups without answers that week get 0 %
+        shares = percentages[cube.weeks.index(week), e, q]
+        data = {
+            val: shares[:, val - 1] if 1 <= val <= shares.shape[-1] else np.zeros(len(edu_programs))
+            for val in likert_values
+        }
 
         bottom = np.zeros(len(edu_programs))
         for val, color in zip(likert_values, colors):
@@ -304,105 +263,94 @@ def plot_stacked_distribution_multiweek(
     return fig
 
 
+HEATMAP_CELL = (0.8, 0.45)     # inches per (education, question) cell
+HEATMAP_ANNOTATE_MAX = 1000    # cells; beyond this the numbers are left out
+
 def plot_heatmap_questions_grid(dataframes_dict,
     likert_columns,
-    weeks=None):
+    weeks=None,
+    title="To perform the tasks today, I felt like seeking support from... (median value across all weeks)",
+    annotate=None):
+    """
+    Median answer per question (rows) and education program (columns), one block per week.
+    All weeks are drawn as a single image with a blank column between the blocks,
+    and the figure is sized to the number of weeks, questions and programs.
+    annotate=None writes the medians in the cells unless there are too many.
+    """
+    cube = aggregates.as_cube(dataframes_dict, likert_columns)
 
     if weeks is None:
-        weeks = sorted(dataframes_dict.keys())
+        weeks = cube.weeks
 
     # collect all education programs across all weeks
-    education_programs = sorted({
-        edu
-        for week_data in dataframes_dict.values()
-        for edu in week_data.keys()
-    })
-
-    n_weeks = len(weeks)
-    n_cols = n_weeks if n_weeks <= 3 else 3
-    n_rows = (n_weeks + n_cols - 1) // n_cols
-
-    fig, axes = plt.subplots(
-        n_rows, n_cols,
-        figsize=(18, 5 * n_rows),
-        squeeze=False
+    education_programs = cube.educations
+    n_weeks, n_questions, n_edu = len(weeks), len(likert_columns), len(education_programs)
+
+    # (week, question, education) medians in one step, NaN without answers
+    medians = np.full((n_weeks, n_questions, n_edu), np.nan)
+    w = [i for i, week in enumerate(weeks) if week in cube.weeks]
+    q = [i for i, question in enumerate(likert_columns) if question in cube.questions]
+    cube_w = cube.week_index([weeks[i] for i in w])
+    cube_q = cube.question_index([likert_columns[i] for i in q])
+    medians[np.ix_(w, q)] = cube.median()[np.ix_(cube_w, range(n_edu), cube_q)].transpose(0, 2, 1)
+
+    # weeks side by side in one image, separated by an empty column
+    columns = (np.arange(n_weeks)[:, None] * (n_edu + 1) + np.arange(n_edu)).ravel()
+    grid = np.full((n_questions, max(n_weeks * (n_edu + 1) - 1, 1)), np.nan)
+    grid[:, columns] = medians.transpose(1, 0, 2).reshape(n_questions, -1)
+
+    fig, ax = plt.subplots(
+        figsize=(HEATMAP_CELL[0] * grid.shape[1] + 5, HEATMAP_CELL[1] * n_questions + 2.5),
+        layout="constrained"
     )
-
-    # Create axis for shared colorbar (right side)
-    cbar_ax = fig.add_axes([0.92, 0.15, 0.02, 0.7])
-
-    for idx, week in enumerate(weeks):
-        ax = axes[idx // n_cols][idx % n_cols]
-
-        matrix = []
-        for question in likert_columns:
-            row = []
-            for edu in education_programs:
-                if (
-                    week in dataframes_dict
-                    and edu in dataframes_dict[week]
-                    and question in dataframes_dict[week][edu].columns
-                ):
-                    row.append(
-                        dataframes_dict[week][edu][question].median()
-                    )
-                else:
-                    row.append(np.nan)
-            matrix.append(row)
-
-        short_labels = [
-            q[:50] + "..." if len(q) > 50 else q
-            for q in likert_columns
-        ]
-
-        sns.heatmap(
-            matrix,
-            xticklabels=education_programs,
-            yticklabels=short_labels,
-            annot=True,
-            fmt=".2f",
-            cmap="vlag_r",
-            center=3.5,
-            vmin=1,
-            vmax=6,
-            cbar=idx == 0,  # one shared colorbar
-            cbar_ax=cbar_ax if idx == 0 else None,
-            ax=ax
-        )
-
-        ax.set_title(f"Week {week}", fontsize=12, fontweight="bold")
-        ax.tick_params(axis="x", rotation=45)
-
-        # Hide y-axis labels for non-left columns
-        if idx % n_cols != 0:
-            ax.tick_params(axis="y", labelleft=False)
-
-    # Hide unused subplots
-    for idx in range(n_weeks, n_rows * n_cols):
-        axes[idx // n_cols][idx % n_cols].set_visible(False)
-
-    plt.suptitle(
-        "To perform the tasks today, I felt like seeking support from... (median value across all weeks)",
+    cmap = sns.color_palette("vlag_r", as_cmap=True)
+    norm = plt.Normalize(vmin=1, vmax=6)
+    image = ax.imshow(np.ma.masked_invalid(grid), cmap=cmap, norm=norm, aspect="auto", interpolation="nearest")
+    fig.colorbar(image, ax=ax, fraction=0.03, pad=0.02)
+
+    short_labels = [
+        q[:50] + "..." if len(q) > 50 else q
+        for q in likert_columns
+    ]
+    ax.set_yticks(range(n_questions), short_labels)
+    ax.set_xticks(columns, education_programs * n_weeks, rotation=45, ha="right")
+    ax.tick_params(length=0)
+    ax.grid(False)
+    for side in ax.spines.values():
+        side.set_visible(False)
+
+    # week headers over each block
+    for i, week in enumerate(weeks):
+        ax.text(i * (n_edu + 1) + (n_edu - 1) / 2, -0.6, f"Week {week}",
+                ha="center", va="bottom", fontsize=12, fontweight="bold")
+
+    rows, cols = np.nonzero(~np.isnan(grid))
+    if annotate is None:
+        annotate = len(rows) <= HEATMAP_ANNOTATE_MAX
+    if annotate:
+        values = grid[rows, cols]
+        # dark text on light cells and vice versa, same rule as seaborn
+        rgb = cmap(norm(values))[:, :3]
+        luminance = (np.where(rgb <= 0.03928, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+                     @ [0.2126, 0.7152, 0.0722])
+        text_colors = np.where(luminance > 0.408, "black", "white")
+        for r, c, value, color in zip(rows, cols, values, text_colors):
+            ax.text(c, r, f"{value:.2f}", ha="center", va="center", fontsize=9, color=color)
+
+    fig.suptitle(
+        title,
         fontsize=16,
-        fontweight="bold",
-        y=0.98
-    )
-    fig.subplots_adjust(
-    left=0.07,
-    right=0.9,   # plads til colorbar
-    top=0.8,
-    bottom=0.265,
-    wspace=0.13,
-    hspace=0.35
+        fontweight="bold"
     )
     return fig
 
 
 
-def create_summary_report(dataframes_dict, likert_columns):
+def create_summary_report(dataframes_dict, likert_columns, title='Survey Results Over Time - All Questions'):
     """
     Create a comprehensive visualization with multiple subplots.
     """
+    cube = aggregates.as_cube(dataframes_dict, likert_columns)
     n_questions = len(likert_columns)
     n_cols = 3
     n_rows = (n_questions + n_cols - 1) // n_cols
@@ -410,35 +358,19 @@ def create_summary_report(dataframes_dict, likert_columns):
     fig, axes = plt.subplots(n_rows, n_cols, figsize=(16, 5 * n_rows))
     axes = axes.flatten()
 
-    global_min = np.inf
-    global_max = -np.inf
-
-    for week_data in dataframes_dict.values():
-        for df in week_data.values():
-            for col in likert_columns:
-                if col in df.columns:
-                    global_min = min(global_min, df[col].min())
-                    global_max = max(global_max, df[col].max())
+    global_min, global_max = cube.value_range(likert_columns) or (np.nan, np.nan)
     
-    weeks = sorted(dataframes_dict.keys())
-    education_programs = set()
-    for week_data in dataframes_dict.values():
-        education_programs.update(week_data.keys())
+    weeks = cube.weeks
+    education_programs = cube.educations
+    mean = cube.mean()  # (week, education, question), NaN without answers
     
     colors = sns.color_palette("husl", len(education_programs))
     
     for idx, question_col in enumerate(likert_columns):
         ax = axes[idx]
         
-        for edu, color in zip(sorted(education_programs), colors):
-            means = []
-            
-            for week in weeks:
-                if edu in dataframes_dict[week] and question_col in dataframes_dict[week][edu].columns:
-                    df = dataframes_dict[week][edu]
-                    means.append(df[question_col].mean())
-                else:
-                    means.append(np.nan)
+        for e, (edu, color) in enumerate(zip(education_programs, colors)):
+            means = mean[:, e, cube.questions.index(question_col)]
             
             ax.plot(weeks, means, marker='o', label=edu, color=color, linewidth=2)
         
@@ -464,12 +396,34 @@ def create_summary_report(dataframes_dict, likert_columns):
     for idx in range(len(likert_columns), len(axes)):
         axes[idx].set_visible(False)
     
-    plt.suptitle('Survey Results Over Time - All Questions', 
+    plt.suptitle(title, 
                  fontsize=16, fontweight='bold', y=0.995)
     plt.tight_layout()
     return fig
 
 
+def write_summary_pdf(dataframes_dict, question_groups, path):
+    """
+    Write the summary report as a multi-page PDF, one page per question group.
+    question_groups is {page title: [questions]}. The counts are aggregated once
+    and each page's figure is closed as soon as it is written, so memory stays
+    at one page however many groups there are.
+    """
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    questions = list(dict.fromkeys(q for group in question_groups.values() for q in group))
+    cube = aggregates.as_cube(dataframes_dict, questions)
+
+    with PdfPages(path) as pdf:
+        for title, group in question_groups.items():
+            fig = create_summary_report(cube, group, title)
+            pdf.savefig(fig)
+            plt.close(fig)
+        info = pdf.infodict()
+        info["Title"] = "Survey Results Over Time"
+    return path
+
+
 def plot_histogram_multiweek(
     dataframes_dict,
     question_cols,   # <-- LISTE af kolonnenavne
@@ -477,6 +431,7 @@ def plot_histogram_multiweek(
     bins=5,
     title=None
 ):
+    dataframes_dict = survey_table.as_nested(dataframes_dict)
     import matplotlib.pyplot as plt
     import numpy as np
 
@@ -538,6 +493,59 @@ def plot_histogram_multiweek(
 
 
 
+def plot_transition_matrix(transitions_data, question_col, pair, education=None, likert_mapping=None, title=None):
+    """
+    Heatmap of how tracked respondents moved between answers from one week to another.
+    Rows are the answer in the first week, columns the answer in the second week.
+    """
+    matrix = transitions.transition_matrix(transitions_data, question_col, pair, education)
+    if likert_mapping:
+        # keep only the levels of this question's scale
+        levels = sorted(set(likert_mapping.values()))
+        labels = {v: k for k, v in likert_mapping.items()}
+        matrix = matrix.loc[levels, levels]
+        matrix.index = [labels[v] for v in levels]
+        matrix.columns = [labels[v] for v in levels]
+
+    fig, ax = plt.subplots(figsize=(9, 7))
+    sns.heatmap(matrix, annot=True, fmt="d", cmap="Blues", cbar=False, ax=ax)
+    ax.set_xlabel(f"Week {pair[1]}", fontsize=12)
+    ax.set_ylabel(f"Week {pair[0]}", fontsize=12)
+    ax.set_title(title or f"{question_col}\n{education or 'All students'}", fontsize=14, fontweight="bold")
+    plt.tight_layout()
+    return fig
+
+
+def plot_change_shares(transitions_data, question_col, title=None):
+    """
+    Stacked bars of the share of tracked respondents whose answer declined,
+    stayed the same or improved, for every week pair and education group.
+    """
+    shares = transitions_data.shares.xs(question_col, level="question")
+    educations = list(dict.fromkeys(shares.index.get_level_values("education")))
+
+    fig, axes = plt.subplots(1, len(educations), figsize=(6 * len(educations), 5), squeeze=False, sharey=True)
+    colors = sns.color_palette("vlag_r", 3)
+
+    for ax, edu in zip(axes[0], educations):
+        edu_shares = shares.xs(edu, level="education")
+        bottom = np.zeros(len(edu_shares))
+        for label, color in zip(transitions.CHANGE_LABELS, colors):
+            values = edu_shares[label].fillna(0).to_numpy() * 100
+            ax.bar(edu_shares.index, values, bottom=bottom, label=label, color=color)
+            bottom += values
+        ax.set_title(edu, fontsize=12, fontweight="bold")
+        ax.set_ylim(0, 100)
+        ax.tick_params(axis="x", rotation=45)
+
+    axes[0][0].set_ylabel("Percentage", fontsize=12)
+    axes[0][-1].legend(title="Change", bbox_to_anchor=(1.05, 1), loc="upper left")
+    plt.suptitle(title or question_col, fontsize=16, fontweight="bold")
+    plt.tight_layout()
+    return fig
+
+
+
 # Example usage:
 """
 # Your flat dictionary structure:
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# modules in src/ import each other by name, as when the scripts are run from there
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
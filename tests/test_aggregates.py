@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import aggregates
+import survey_table
+from survey_schema import load_schema
+
+QUESTIONS = ["Q1", "Q2"]
+
+
+def nested():
+    rng = np.random.default_rng(3)
+
+    def frame(n):
+        q2 = rng.integers(1, 6, n).astype(float)  # nobody answers 6 on Q2
+        q2[rng.random(n) < 0.2] = np.nan
+        return pd.DataFrame({"Anon_ID": [f"id{i}" for i in range(n)],
+                             "Q1": rng.integers(1, 7, n).astype(float), "Q2": q2})
+
+    return {
+        5: {"arch_students": frame(9), "oth_students": frame(5)},
+        6: {"arch_students": frame(7)},  # oth_students did not answer in week 6
+    }
+
+
+def old_percentages(dataframes_dict, question, week, levels):
+    """ The per-group value_counts the stacked bar charts used before the cube. """
+    data = {val: [] for val in levels}
+    for edu in sorted(dataframes_dict[week]):
+        counts = dataframes_dict[week][edu][question].value_counts()
+        total = counts.sum()
+        for val in levels:
+            data[val].append((counts.get(val, 0) / total * 100) if total > 0 else 0)
+    return data
+
+
+def test_percentages_match_pandas():
+    data = nested()
+    cube = aggregates.as_cube(data, QUESTIONS)
+    percentages = cube.percentages()
+
+    for week in data:
+        w = cube.weeks.index(week)
+        edus = [cube.educations.index(edu) for edu in sorted(data[week])]
+        for question in QUESTIONS:
+            q = cube.questions.index(question)
+            old = old_percentages(data, question, week, list(cube.levels))
+            for val, shares in old.items():
+                assert percentages[w, edus, q, val - 1] == pytest.approx(shares)
+
+
+def test_quantiles_and_means_match_pandas():
+    data = nested()
+    cube = aggregates.as_cube(data, QUESTIONS)
+    q1, median, q3 = cube.quantiles([0.25, 0.5, 0.75])
+    mean = cube.mean()
+
+    for week, groups in data.items():
+        for edu, df in groups.items():
+            w, e = cube.weeks.index(week), cube.educations.index(edu)
+            for question in QUESTIONS:
+                q = cube.questions.index(question)
+                values = df[question].dropna()
+                assert median[w, e, q] == values.median()
+                assert q1[w, e, q] == values.quantile(0.25)
+                assert q3[w, e, q] == values.quantile(0.75)
+                assert mean[w, e, q] == pytest.approx(values.mean())
+
+    # no answers: NaN, and the group is not present
+    w, e = cube.weeks.index(6), cube.educations.index("oth_students")
+    assert np.isnan(median[w, e]).all() and not cube.present[w, e]
+
+
+def test_levels_follow_the_schema():
+    cube = aggregates.as_cube(nested(), QUESTIONS)
+
+    assert cube.counts.shape[-1] == load_schema().levels
+    assert cube.value_range(["Q2"]) == (1, 5)
+    assert (cube.percentages()[..., cube.questions.index("Q2"), 5] == 0).all()
+
+
+def test_from_long_equals_nested():
+    data = nested()
+    flat = {f"{edu}_Week{week}": df for week, groups in data.items() for edu, df in groups.items()}
+    from_long = aggregates.as_cube(survey_table.to_long(flat, QUESTIONS))
+    from_nested = aggregates.as_cube(data, QUESTIONS)
+
+    assert (from_long.counts == from_nested.counts).all()
+    assert from_long.educations == from_nested.educations
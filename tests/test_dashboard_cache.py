@@ -0,0 +1,52 @@
+import threading
+
+from components.cache import LRUCache, memoize
+
+
+def test_evicts_least_recently_used_by_size():
+    cache = LRUCache(max_bytes=10)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.get("a")
+    cache.put("c", "xxxx")
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.total == 8
+
+
+def test_value_larger_than_cache_is_not_kept():
+    cache = LRUCache(max_bytes=10)
+    cache.put("big", "x" * 11)
+    assert "big" not in cache and cache.total == 0
+
+
+def test_memoize_caches_falsy_results_once():
+    calls = []
+
+    @memoize(LRUCache(max_bytes=100, sizeof=lambda value: 1))
+    def render(key):
+        calls.append(key)
+        return None if key == "none" else key
+
+    assert render("none") is None and render("none") is None
+    assert render("x") == "x" and render("x") == "x"
+    assert calls == ["none", "x"]
+
+
+def test_concurrent_use_keeps_size_bound():
+    cache = LRUCache(max_bytes=50, sizeof=len)
+
+    def work(n):
+        for i in range(200):
+            key = (n, i % 7)
+            if cache.get(key) is None:
+                cache.put(key, "x" * 5)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.total <= 50
+    assert cache.total == sum(size for _, size in cache.entries.values())
@@ -0,0 +1,33 @@
+import pandas as pd
+
+import main_analysis
+from main_analysis import SCHEMA
+
+
+def write_week(directory, week, n=3):
+    """ A minimal anonymised week file with every column the analysis reads. """
+    data = {"Anon_ID": [f"id{i}" for i in range(n)], SCHEMA.consent: ["Yes"] * n}
+    data[SCHEMA.education[0]] = ["Other"] * n
+    data[SCHEMA.education[1]] = ["I am still on my bachelor's"] * n
+    for question in SCHEMA.questions:
+        data[question] = [list(SCHEMA.scale(question))[0]] * n
+    directory.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(data).to_parquet(directory / f"AGILE_{week}_anon.parquet")
+
+
+def test_refresh_picks_up_files_after_empty_start(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dataset = main_analysis.Dataset(max_workers=1)
+
+    # --watch started before any week was exported
+    assert dataset.weeks == {}
+    assert dataset.refresh() == []
+
+    write_week(tmp_path / main_analysis.ANON_DIR, 5)
+    assert dataset.refresh() == ["Week5"]
+    assert list(dataset.weeks) == ["Week5"]
+    assert set(dataset.long["week"].astype(int)) == {5}
+
+    write_week(tmp_path / main_analysis.ANON_DIR, 6)
+    assert dataset.refresh() == ["Week6"]
+    assert sorted(set(dataset.long["week"].astype(int))) == [5, 6]
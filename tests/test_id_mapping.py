@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from openpyxl import Workbook
+
+import id_mapping
+
+
+def write_workbook(path: Path, columns: dict) -> None:
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Navn", "Mail"] + list(columns))
+    n = len(next(iter(columns.values())))
+    for i in range(n):
+        ws.append([f"Person {i}", f"person{i}@example.com"] + [values[i] for values in columns.values()])
+    wb.save(path)
+
+
+def test_parquet_types_cover_all_chunks(tmp_path):
+    infile = tmp_path / "AGILE_1.xlsx"
+    write_workbook(infile, {
+        "mixed_numbers": [1, 2, 3, 4.5, 5, 6],       # int in chunk 1, float later
+        "late_number": [None, None, None, 7, None, 8],  # empty in chunk 1
+        "text_then_number": ["a", "b", "c", 1, 2, 3],
+        "integers": [1, 2, 3, 4, 5, 6],
+    })
+
+    outfile = id_mapping.anonymise_file(infile, tmp_path / "out", "parquet", chunk_size=3,
+                                        id_store=tmp_path / "id_map.sqlite")
+    table = pq.read_table(outfile)
+
+    assert table.schema.field("mixed_numbers").type == pa.float64()
+    assert table.column("mixed_numbers").to_pylist() == [1, 2, 3, 4.5, 5, 6]
+    assert table.column("late_number").to_pylist() == [None, None, None, 7, None, 8]
+    assert table.column("text_then_number").to_pylist() == ["a", "b", "c", "1", "2", "3"]
+    assert table.schema.field("integers").type == pa.int64()
+    assert "Mail" not in table.column_names and "Navn" not in table.column_names
+    assert table.column("Anon_ID").null_count == 0
+
+
+def test_write_parquet_refuses_lossy_cast(tmp_path):
+    schema = pa.schema([("value", pa.int64())])
+    with pytest.raises(pa.ArrowInvalid):
+        id_mapping.write_parquet(tmp_path / "out.parquet", ["value"], [[[1], [2]], [[4.5]]], schema)
+
+
+def test_id_store_imports_legacy_csv_next_to_it(tmp_path):
+    (tmp_path / "id_map.csv").write_text("Mail,Anon_ID\np0@uni.dk,legacy0001\n", encoding="utf-8")
+    conn = id_mapping.open_id_store(tmp_path / "id_map.sqlite")
+    try:
+        assert id_mapping.get_or_create_ids(conn, {"p0@uni.dk"}) == {"p0@uni.dk": "legacy0001"}
+    finally:
+        conn.close()
+
+
+def test_id_store_elsewhere_ignores_other_csv(tmp_path):
+    other = tmp_path / "other"
+    other.mkdir()
+    (tmp_path / "id_map.csv").write_text("Mail,Anon_ID\np0@uni.dk,legacy0001\n", encoding="utf-8")
+    conn = id_mapping.open_id_store(other / "id_map.sqlite")
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM id_map").fetchone()[0] == 0
+    finally:
+        conn.close()
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from likert_conversion import LikertEncoder
+
+SCALE = {"Completely disagree": 1, "Mostly disagree": 2, "Mostly agree": 5}
+
+
+def test_encode_gives_int8_with_missing_as_na():
+    df = pd.DataFrame({
+        "Q1": ["Completely disagree", " Mostly  agree ", None, "Mostly disagree"],
+        "Anon_ID": ["a", "b", "c", "d"],
+    })
+    encoded = LikertEncoder({"Q1": SCALE}).encode(df)
+
+    assert encoded["Q1"].dtype == "Int8"
+    assert encoded["Q1"].tolist() == [1, 5, pd.NA, 2]
+    assert encoded["Anon_ID"].tolist() == ["a", "b", "c", "d"]
+    assert df["Q1"].iloc[0] == "Completely disagree"  # input is not modified
+
+
+def test_unmapped_answers_are_reported_once():
+    encoder = LikertEncoder({"Q1": SCALE, "Q2": SCALE})
+    encoder.encode(pd.DataFrame({"Q1": ["Maybe", "Mostly agree", "Maybe"], "Q2": ["Mostly agree"] * 3}))
+    encoded = encoder.encode(pd.DataFrame({"Q1": ["Maybe", "Never"], "Q2": ["Mostly agree"] * 2}))
+
+    assert encoded["Q1"].isna().all()
+    assert encoder.unmapped == {"Q1": ["Maybe", "Never"]}
+
+
+def test_columns_without_scale_are_left_alone():
+    df = pd.DataFrame({"Other": ["x", "y"]})
+    encoded = LikertEncoder({"Q1": SCALE}).encode(df)
+    assert encoded["Other"].tolist() == ["x", "y"]
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+import paired_stats
+import survey_table
+
+
+def long_table():
+    rng = np.random.default_rng(7)
+    ids = [f"id{i}" for i in range(12)]
+    week5 = rng.integers(1, 7, len(ids))
+    week6 = np.clip(week5 + rng.integers(-1, 3, len(ids)), 1, 6)
+    flat = {
+        "arch_students_Week5": pd.DataFrame({"Anon_ID": ids, "Q1": week5}),
+        # id11 skipped week 6, so it is not matched
+        "arch_students_Week6": pd.DataFrame({"Anon_ID": ids[:-1], "Q1": week6[:-1]}),
+    }
+    return survey_table.to_long(flat, ["Q1"]), week5[:-1], week6[:-1]
+
+
+def test_wilcoxon_matches_scipy():
+    long, before, after = long_table()
+    result = paired_stats.paired_tests(long, n_boot=200, max_workers=1)
+    row = result.loc[(paired_stats.ALL_STUDENTS, "Q1", 5, 6)]
+
+    expected = stats.wilcoxon(after, before, method=paired_stats.WILCOXON_METHOD)
+    assert row["n"] == len(before)
+    assert row["p_value"] == pytest.approx(expected.pvalue)
+    assert row["wilcoxon_stat"] == pytest.approx(expected.statistic)
+    assert row["median_shift"] == np.median(after) - np.median(before)
+    assert row["mean_shift"] == pytest.approx(np.mean(after - before))
+
+
+def test_bootstrap_same_with_and_without_pool():
+    long, _, _ = long_table()
+    serial = paired_stats.paired_tests(long, n_boot=200, seed=11, max_workers=1)
+    pooled = paired_stats.paired_tests(long, n_boot=200, seed=11, max_workers=2)
+
+    pd.testing.assert_frame_equal(serial, pooled)
+    assert serial.loc[(paired_stats.ALL_STUDENTS, "Q1", 5, 6), "mean_ci_low"] <= \
+        serial.loc[(paired_stats.ALL_STUDENTS, "Q1", 5, 6), "mean_ci_high"]
+
+
+def test_bootstrap_is_reproducible_for_a_seed():
+    before = np.array([1, 2, 3, 4, 5], dtype=float)
+    after = np.array([2, 2, 4, 5, 6], dtype=float)
+    first = paired_stats.bootstrap_shift(before, after, seed=3, n_boot=500)
+    second = paired_stats.bootstrap_shift(before, after, seed=3, n_boot=500)
+    assert first == second
+    assert paired_stats.bootstrap_shift(before[:0], after[:0], seed=3)[0] == 0
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import aggregates
+import plotting_data
+import survey_table
+
+SIX = ["Completely disagree", "Mostly disagree", "Slightly disagree",
+       "Slightly agree", "Mostly agree", "Completely agree"]
+
+
+def cube(levels=None):
+    flat = {
+        "arch_students_Week5": pd.DataFrame({"Anon_ID": ["a", "b"], "Q1": [1, 2]}),
+        "arch_students_Week6": pd.DataFrame({"Anon_ID": ["a", "b"], "Q1": [2, 2]}),
+    }
+    return aggregates.AggregateCube.from_long(survey_table.to_long(flat, ["Q1"]), levels=levels)
+
+
+def test_trace_per_label_and_shares():
+    fig = plotting_data.stacked_area(cube(), "Q1", level_labels=SIX)
+
+    assert [trace.name for trace in fig.data] == SIX
+    # week 5: half 1, half 2; the top trace always reaches 100 %
+    assert list(fig.data[0].customdata) == [50, 0]
+    assert list(fig.data[1].customdata) == [50, 100]
+    assert list(fig.data[-1].y) == [100, 100]
+
+
+def test_short_cube_is_padded_to_the_scale():
+    fig = plotting_data.stacked_area(cube(levels=2), "Q1", level_labels=SIX)
+    assert len(fig.data) == 6
+    assert list(fig.data[5].customdata) == [0, 0]
+
+
+def test_label_count_must_match_array():
+    with pytest.raises(ValueError):
+        plotting_data.stacked_area(np.ones((5, 3)), level_labels=SIX)
+
+
+def test_counted_dataframe_and_webgl():
+    counted = pd.DataFrame(np.arange(14).reshape(7, 2), index=list("abcdefg"), columns=["Week5", "Week6"])
+    fig = plotting_data.stacked_area(counted, "Q", webgl=True)
+    assert len(fig.data) == 7
+    assert type(fig.data[0]).__name__ == "Scattergl"
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+import response_rates
+import survey_table
+
+
+def long_table():
+    # archeng: a, b in week 5; a, c in week 6.  arch: d in both weeks
+    flat = {
+        "archeng_students_Week5": pd.DataFrame({"Anon_ID": ["a", "b"], "Q1": [1, 2]}),
+        "arch_students_Week5": pd.DataFrame({"Anon_ID": ["d"], "Q1": [3]}),
+        "archeng_students_Week6": pd.DataFrame({"Anon_ID": ["a", "c"], "Q1": [4, 5]}),
+        "arch_students_Week6": pd.DataFrame({"Anon_ID": ["d"], "Q1": [6]}),
+    }
+    return survey_table.to_long(flat, ["Q1"])
+
+
+def test_response_counts_and_retention():
+    tables = response_rates.response_tables(long_table(), enrolment={})
+
+    counts = tables["Response Rates"]
+    assert counts.loc["archeng"].tolist() == [2, 2]
+    assert counts.loc["arch"].tolist() == [1, 1]
+    assert counts.loc["Total"].tolist() == [3, 3]
+    assert "Rate of Enrolment" not in tables
+
+    retention = tables["Retention"]["Week5-Week6"]
+    assert retention["archeng"] == pytest.approx(1 / 2)  # only a came back
+    assert retention["arch"] == pytest.approx(1.0)
+    assert retention["Total"] == pytest.approx(2 / 3)
+
+
+def test_rate_of_enrolment():
+    tables = response_rates.response_tables(long_table(), enrolment={"archeng": 4, "arch": 2})
+
+    rates = tables["Rate of Enrolment"]
+    assert rates.loc["archeng"].tolist() == pytest.approx([0.5, 0.5])
+    assert rates.loc["arch"].tolist() == pytest.approx([0.5, 0.5])
+    assert rates.loc["Total"].tolist() == pytest.approx([0.5, 0.5])
+
+
+def test_presence_table():
+    lines, weeks, line_of_row, present = response_rates.presence(long_table())
+
+    assert weeks == [5, 6]
+    assert sorted(lines) == ["arch", "archeng"]
+    by_line = {line: sorted(map(tuple, present[line_of_row == i].tolist())) for i, line in enumerate(lines)}
+    assert by_line["archeng"] == [(False, True), (True, False), (True, True)]
+    assert by_line["arch"] == [(True, True)]
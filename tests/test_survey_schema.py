@@ -0,0 +1,30 @@
+import json
+
+import main_analysis
+import survey_schema
+
+
+def raw_schema() -> dict:
+    with open(survey_schema.SCHEMA_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_new_construct_needs_only_the_json():
+    raw = raw_schema()
+    raw["constructs"]["SATISFACTION"] = {"scale": "likert_6pt", "questions": ["I enjoyed today"]}
+    schema = survey_schema.Schema(raw)
+
+    consent, edu, info, constructs, include_in_df, likerts = main_analysis.to_include(schema)
+
+    assert constructs["SATISFACTION"] == ["I enjoyed today"]
+    assert include_in_df[-1] == "I enjoyed today"
+    assert schema.scale("I enjoyed today") is likerts["likert_6pt"]
+    assert schema.number("I enjoyed today") == len(schema.questions)
+
+
+def test_module_constants_follow_the_schema():
+    schema = main_analysis.SCHEMA
+    for construct, questions in schema.constructs.items():
+        assert getattr(main_analysis, construct) == questions
+    assert main_analysis.include_in_df == schema.include_in_df
+    assert main_analysis.PARTICIPANT_INFO_AGREEMENT == schema.consent
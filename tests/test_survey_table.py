@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+import main_analysis
+import survey_table
+
+QUESTIONS = ["Q1", "Q2"]
+
+
+def flat_data() -> dict:
+    return {
+        "arch_students_Week5": pd.DataFrame({"Anon_ID": ["a", "b"], "Q1": [1, 2], "Q2": [3, np.nan]}),
+        "oth_students_Week5": pd.DataFrame({"Anon_ID": ["c"], "Q1": [4], "Q2": [5]}),
+        "arch_students_Week6": pd.DataFrame({"Anon_ID": ["a"], "Q1": [6], "Q2": [1]}),
+    }
+
+
+def test_to_nested_round_trip():
+    nested = survey_table.to_nested(survey_table.to_long(flat_data(), QUESTIONS))
+
+    assert sorted(nested) == [5, 6]
+    assert sorted(nested[5]) == ["arch_students", "oth_students"]
+    week5 = nested[5]["arch_students"].set_index("Anon_ID")
+    assert week5.loc["a", "Q1"] == 1 and week5.loc["b", "Q1"] == 2
+    assert np.isnan(week5.loc["b", "Q2"])
+
+
+def test_dataset_builds_nested_once():
+    dataset = main_analysis.Dataset(files=[])
+    dataset.__dict__["long"] = survey_table.to_long(flat_data(), QUESTIONS)
+
+    assert dataset.nested is dataset.nested
+    assert sorted(dataset.nested) == [5, 6]
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+import survey_table
+import timeseries
+
+
+def long_table():
+    flat = {
+        # a answered twice in week 5: the second answer wins, a missing answer does not
+        "arch_students_Week5": pd.DataFrame({
+            "Anon_ID": ["a", "b", "a"],
+            "Q1": [1, 2, 4],
+            "Q2": [3, 3, np.nan],
+        }),
+        "arch_students_Week6": pd.DataFrame({"Anon_ID": ["b"], "Q1": [5], "Q2": [6]}),
+    }
+    return survey_table.to_long(flat, ["Q1", "Q2"])
+
+
+def test_panel_keeps_last_answer():
+    panel = timeseries.build_panel(long_table())
+    a = list(panel.ids).index("a")
+
+    assert panel.weeks == [5, 6]
+    assert panel.values[a, 0, panel.questions.index("Q1")] == 4
+    assert panel.values[a, 0, panel.questions.index("Q2")] == 3
+    assert panel.values.mask[a, 1].all()  # a did not answer in week 6
+    assert panel.education[a, 1] == -1
+
+
+def test_time_series_df_one_row_per_respondent():
+    df = timeseries.time_series_df(long_table(), "Q1")
+
+    assert list(df.columns) == ["Anon_ID", "Week5", "Week6"]
+    assert df["Anon_ID"].tolist() == ["a", "b"]
+    assert df.loc[0, "Week5"] == 4 and np.isnan(df.loc[0, "Week6"])
+    assert df.loc[1].tolist()[1:] == [2, 5]
@@ -0,0 +1,53 @@
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import survey_table
+import transitions
+from survey_schema import load_schema
+
+
+def long_table():
+    # Q1 on a 6-point scale where nobody answers 6
+    flat = {
+        "arch_students_Week5": pd.DataFrame({"Anon_ID": ["a", "b", "c", "d"], "Q1": [1, 3, 3, 5]}),
+        "arch_students_Week6": pd.DataFrame({"Anon_ID": ["a", "b", "c", "e"], "Q1": [2, 3, 1, 4]}),
+    }
+    return survey_table.to_long(flat, ["Q1"])
+
+
+def test_transition_matrix_by_hand():
+    result = transitions.compute_transitions(long_table())
+    matrix = transitions.transition_matrix(result, "Q1", (5, 6))
+
+    # tracked: a 1->2, b 3->3, c 3->1; d and e answered only one week
+    expected = np.zeros((result.levels, result.levels), dtype=int)
+    expected[0, 1] = 1
+    expected[2, 2] = 1
+    expected[2, 0] = 1
+    assert (matrix.to_numpy() == expected).all()
+    assert matrix.index.name == "Week5" and matrix.columns.name == "Week6"
+
+
+def test_change_shares():
+    shares = transitions.compute_transitions(long_table()).shares
+    row = shares.loc[("arch_students", "Q1", "Week5-Week6")]
+
+    assert row["n"] == 3
+    assert row[["declined", "stable", "improved"]].tolist() == pytest.approx([1 / 3, 1 / 3, 1 / 3])
+
+
+def test_unanswered_top_level_keeps_full_scale():
+    result = transitions.compute_transitions(long_table())
+    assert result.levels == load_schema().levels
+    matrix = transitions.transition_matrix(result, "Q1", (5, 6))
+    assert list(matrix.index) == list(range(1, result.levels + 1))
+
+    import visualisation
+    scale = load_schema().scales["likert_6pt"]
+    fig = visualisation.plot_transition_matrix(result, "Q1", (5, 6), likert_mapping=scale)
+    labels = [t.get_text() for t in fig.axes[0].get_xticklabels()]
+    assert labels[-1] == "Completely agree"